@@ -2,6 +2,7 @@
 Template-check package.
 Public API:
     run_template_check(exif_struct, filename, template_id, file_size_bytes=None)
+    run_template_checks(items)  # batch form, results in input order
 
 Template IDs are simple strings:
     "TEB_MAIN_V1"
@@ -9,6 +10,6 @@ Template IDs are simple strings:
     "ENPARA_MAIN_V1"
 """
 
-from .engine import run_template_check
+from .engine import run_template_check, run_template_checks
 
-__all__ = ["run_template_check"]
+__all__ = ["run_template_check", "run_template_checks"]
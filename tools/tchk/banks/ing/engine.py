@@ -16,12 +16,18 @@ Output:
 """
 
 import json
-import html
-import re
+import os
+import sys
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 from pathlib import Path
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Callable, Dict, List, Tuple, Any, Optional
+
+try:  # optional: faster template JSON parsing when orjson is installed
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 def _find_base_dir() -> Path:
     """Find project root by walking up until meta_templates/ exists.
@@ -44,63 +50,164 @@ ALLOWED_TEMPLATE_IDS = ['ING_MAIN_V1']
 # Align all report lines so values after ":" start in the same column.
 _KEY_W = 16  # longest label we print is "Value mismatches"
 
+# CSS classes used by the report/tabs. Interned once so the style dicts and
+# _span() calls share the same objects.
+_CLS_OK = sys.intern("tc-ok")
+_CLS_BAD = sys.intern("tc-bad")
+_CLS_WARN = sys.intern("tc-warn")
+_CLS_DIM = sys.intern("tc-dim")
+
+# Tab rows are formatted straight from these opening tags instead of two
+# _span() calls per line; (key, value) style pairs are shared per row.
+_OPEN_OK = f'<span class="{_CLS_OK}">'
+_OPEN_BAD = f'<span class="{_CLS_BAD}">'
+_CLOSE = "</span>"
+_OK_OK = (_OPEN_OK, _OPEN_OK)
+_OK_BAD = (_OPEN_OK, _OPEN_BAD)
+_BAD_BAD = (_OPEN_BAD, _OPEN_BAD)
+
 
 # -----------------------------
 # Template loader
 # -----------------------------
-def _load_template_by_id(template_id: str) -> dict:
-    if not META_TEMPLATES_DIR.exists():
-        raise FileNotFoundError("meta_templates/ folder not found")
-
-    for path in META_TEMPLATES_DIR.rglob("*.json"):
+# Parsed templates keyed by (path, st_mtime_ns): editing a template on disk
+# changes its mtime, so the next check re-reads it.
+_TPL_CACHE: Dict[Tuple[str, int], dict] = {}
+# template id -> json path, filled by one scandir walk on first use (and on misses).
+_ID_INDEX: Dict[str, str] = {}
+_META_TEMPLATES_STR = str(META_TEMPLATES_DIR)
+
+
+def _read_template(path: str) -> dict:
+    key = (path, os.stat(path).st_mtime_ns)
+    data = _TPL_CACHE.get(key)
+    if data is None:
+        with open(path, "rb") as f:
+            data = _json_loads(f.read())
+        data["_path"] = key[0]
+        for stale in [k for k in _TPL_CACHE if k[0] == key[0]]:
+            del _TPL_CACHE[stale]
+        _TPL_CACHE[key] = data
+    return data
+
+
+def _iter_template_files(root: str):
+    """*.json files under root, depth-first like rglob, via os.scandir."""
+    subdirs: List[str] = []
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name.endswith(".json") and entry.is_file():
+                    yield entry.path
+    except OSError:
+        return
+    for d in subdirs:
+        yield from _iter_template_files(d)
+
+
+def _index_templates() -> None:
+    _ID_INDEX.clear()
+    for path in _iter_template_files(_META_TEMPLATES_STR):
         try:
-            data = json.loads(path.read_text(encoding="utf-8"))
+            data = _read_template(path)
         except Exception:
             continue
-        if data.get("id") == template_id:
-            data["_path"] = str(path)
-            return data
+        _ID_INDEX.setdefault(data.get("id"), path)
+
+
+def _load_template_by_id(template_id: str) -> dict:
+    path = _ID_INDEX.get(template_id)
+    if path is not None:
+        try:
+            data = _read_template(path)
+            if data.get("id") == template_id:
+                return data
+        except Exception:
+            pass  # removed, renamed or broken since indexed -> rescan
+
+    # Only checked on a miss: a cached hit implies the folder is there.
+    if not os.path.exists(_META_TEMPLATES_STR):
+        raise FileNotFoundError("meta_templates/ folder not found")
+
+    _index_templates()
+    path = _ID_INDEX.get(template_id)
+    if path is not None:
+        return _read_template(path)
 
     raise FileNotFoundError(f"Template id not found: {template_id}")
 
 
+def _tpl_memo(tpl: dict, key: str, build: Callable[[], Any]) -> Any:
+    """Data derived only from the template, kept on the cached template dict.
+
+    A template edited on disk is re-read into a fresh dict, which drops these.
+    """
+    value = tpl.get(key)
+    if value is None:
+        value = tpl[key] = build()
+    return value
+
+
 # -----------------------------
 # Exif struct filtering / flattening
 # -----------------------------
-def _filter_exif_struct(
+def _filter_and_flatten(
     exif_struct: Dict[str, Dict[str, str]],
-    ignore_groups: set[str],
-    ignore_tags: set[str],
-) -> Dict[str, Dict[str, str]]:
-    out: Dict[str, Dict[str, str]] = {}
+    ignore_groups: frozenset[str],
+    ignore_tags: frozenset[str],
+    keep_grouped: bool = True,
+) -> Tuple[Dict[str, Dict[str, str]], Dict[str, str]]:
+    """Apply template ignores and flatten in a single pass.
+
+    Returns (grouped, flat): {Group: {Tag: Value}} and {"Group.Tag": Value}.
+    grouped stays empty when keep_grouped is False.
+    """
+    grouped: Dict[str, Dict[str, str]] = {}
+    flat: Dict[str, str] = {}
     for group, kv in (exif_struct or {}).items():
         if group in ignore_groups:
             continue
         if not isinstance(kv, dict):
             continue
 
+        if type(group) is not str:
+            group = str(group)
+        prefix = group + "."
+        if (not ignore_tags or ignore_tags.isdisjoint(kv)) and all(
+            type(t) is str and type(v) is str for t, v in kv.items()
+        ):
+            # Nothing to drop or coerce: reuse the group dict instead of copying it.
+            for tag, val in kv.items():
+                flat[prefix + tag] = val
+            if keep_grouped and kv:
+                grouped[group] = kv
+            continue
+
         g_out: Dict[str, str] = {}
         for tag, val in kv.items():
-            if str(tag) in ignore_tags:
+            if type(tag) is not str:
+                tag = str(tag)
+            if tag in ignore_tags:
                 continue
-            g_out[str(tag)] = "" if val is None else str(val)
+            if type(val) is not str:
+                val = "" if val is None else str(val)
+            flat[prefix + tag] = val
+            if keep_grouped:
+                g_out[tag] = val
 
         if g_out:
-            out[str(group)] = g_out
-    return out
-
-
-def _flatten(grouped: Dict[str, Dict[str, str]]) -> Dict[str, str]:
-    flat: Dict[str, str] = {}
-    for group, kv in grouped.items():
-        for tag, val in kv.items():
-            flat[f"{group}.{tag}"] = val
-    return flat
+            grouped[group] = g_out
+    return grouped, flat
 
 
 # -----------------------------
 # HTML helpers (safe rendering)
 # -----------------------------
+_EXIFTOOL_HDR = "---- ExifTool ----"
+
+
 def _strip_exiftool_headers(raw: str) -> str:
     """Remove noisy ExifTool header/version sections from raw exif text (UI only).
 
@@ -113,47 +220,107 @@ def _strip_exiftool_headers(raw: str) -> str:
     """
     if not raw:
         return ""
-    lines = raw.splitlines(True)
-    out = []
-    i = 0
-    while i < len(lines):
-        if lines[i].strip() == "---- ExifTool ----":
-            j = i + 1
-            while j < len(lines) and lines[j].strip() == "":
-                j += 1
-            if j < len(lines):
-                nxt = lines[j].lstrip()
-                if nxt.startswith("ExifTool Version") or nxt.startswith("ExifToolVersion"):
-                    # skip header + its version line(s) until the next blank-line break
-                    k = j + 1
-                    while k < len(lines) and lines[k].strip() != "":
-                        k += 1
-                    while k < len(lines) and lines[k].strip() == "":
-                        k += 1
-                    i = k
-                    continue
-        out.append(lines[i])
-        i += 1
-
-    text = "".join(out)
-    return text.lstrip("\n")
+    n = len(raw)
+
+    def line_end(i: int) -> int:
+        e = raw.find("\n", i)
+        return n if e < 0 else e + 1
+
+    # Copy untouched text as slices; only lines around a header hit are inspected.
+    out: List[str] = []
+    pos = 0
+    hit = raw.find(_EXIFTOOL_HDR)
+    while hit >= 0:
+        start = raw.rfind("\n", 0, hit) + 1
+        resume = line_end(hit)
+        if raw[start:resume].strip() == _EXIFTOOL_HDR:
+            j = resume
+            while j < n and not raw[j:line_end(j)].strip():
+                j = line_end(j)
+            if j < n and raw[j:line_end(j)].lstrip().startswith(("ExifTool Version", "ExifToolVersion")):
+                # skip header + its version line(s) until the next blank-line break
+                k = line_end(j)
+                while k < n and raw[k:line_end(k)].strip():
+                    k = line_end(k)
+                while k < n and not raw[k:line_end(k)].strip():
+                    k = line_end(k)
+                out.append(raw[pos:start])
+                pos = resume = k
+        hit = raw.find(_EXIFTOOL_HDR, resume)
+    out.append(raw[pos:])
+
+    return "".join(out).lstrip("\n")
+
+
+# Same output as html.escape(..., quote=False), in a single pass.
+_ESC_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
 
 
 def _esc(s: Any) -> str:
-    return html.escape("" if s is None else str(s), quote=False)
+    if s is None:
+        return ""
+    s = str(s)
+    if "&" not in s and "<" not in s and ">" not in s:
+        return s
+    return s.translate(_ESC_TABLE)
 
 
 def _span(text: str, cls: str | None = None) -> str:
+    # _esc inlined: this runs once per rendered key and value.
+    s = "" if text is None else text if type(text) is str else str(text)
+    if "&" in s or "<" in s or ">" in s:
+        s = s.translate(_ESC_TABLE)
     if cls:
-        return f'<span class="{cls}">{_esc(text)}</span>'
-    return _esc(text)
+        return f'<span class="{cls}">{s}</span>'
+    return s
+
+
+@lru_cache(maxsize=512)
+def _group_header(group: str, cls: str | None = None) -> str:
+    """Escaped "--- Group ---" line; group names repeat across every check."""
+    disp_group = group.replace(":", " / ")
+    return f'{_span(f"--- {disp_group} ---", cls)}\n'
 
 
 def _kv(label: str, value_html: str, label_cls: str | None = None) -> str:
     """
     label is plain text (no colon). value_html is already escaped/spanned HTML.
     """
-    return _span(f"{label:<{_KEY_W}}:", label_cls) + " " + value_html + "\n"
+    return f"{_kv_label(label, label_cls)} {value_html}\n"
+
+
+@lru_cache(maxsize=64)
+def _kv_label(label: str, label_cls: str | None) -> str:
+    # Labels are a small fixed set, so the padded/escaped form is memoized.
+    return _span(f"{label:<{_KEY_W}}:", label_cls)
+
+
+def _section_lines(title: str) -> Tuple[str, str]:
+    """(failing header line, passing "(none)" line) for a report list section."""
+    return (
+        f"{_span(title, _CLS_BAD)}\n",
+        f'{_span(title, _CLS_OK)} {_span("(none)", _CLS_OK)}\n',
+    )
+
+
+# Fixed report fragments, already HTML-safe.
+_HDR_TEMPLATE_CHECK = "==== TEMPLATE CHECK (ExifTool) ====\n"
+_HDR_COUNTS = "---- COUNTS (meaningful keys, after ignores) ----\n"
+_EXTRA_SECTION = _section_lines("EXTRA KEYS:")
+_MISSING_SECTION = _section_lines("MISSING KEYS:")
+_MISMATCH_SECTION = _section_lines("VALUE MISMATCHES:")
+# The three sections when there is nothing to list, as one prebuilt fragment.
+_NONE_SECTIONS = f"{_EXTRA_SECTION[1]}\n{_MISSING_SECTION[1]}\n{_MISMATCH_SECTION[1]}"
+
+
+def _emit_list_section(buf: List[str], section: Tuple[str, str], items: List[str]) -> None:
+    """Append the header plus one red "- item" line per item, or the constant "(none)" line."""
+    hdr, none_line = section
+    if not items:
+        buf.append(none_line)
+        return
+    buf.append(hdr)
+    buf.extend([f"{_OPEN_BAD}- {_esc(it)}{_CLOSE}\n" for it in items])
 
 
 def _human_kb(n_bytes: int) -> str:
@@ -172,46 +339,128 @@ def _tags_sorted(kv: Dict[str, str]) -> List[str]:
 # -----------------------------
 # Grouped log builders
 # -----------------------------
-def _build_template_grouped(
-    required_keys: List[str],
-    expected_values: Dict[str, str],
-) -> Dict[str, Dict[str, str]]:
+_ReqSoA = Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...], Tuple[Any, ...]]
+
+
+def _build_req_soa(required_keys: Tuple[str, ...], expected_values: Dict[str, str]) -> _ReqSoA:
+    """
+    Required keys split once into parallel tuples:
+    (full keys, groups, tags, expected values with "(any)" for unset).
+    """
+    fulls = tuple(required_keys)
+    parts = [k.partition(".") for k in fulls]
+    return (
+        fulls,
+        tuple(p[0] for p in parts),
+        tuple(p[2] for p in parts),
+        tuple(expected_values.get(k, "(any)") for k in fulls),
+    )
+
+
+def _build_template_grouped(soa: _ReqSoA) -> Dict[str, Dict[str, str]]:
+    _fulls, groups, tags, expected = soa
     out: Dict[str, Dict[str, str]] = {}
-    for k in required_keys:
-        group, tag = k.split(".", 1)
-        val = expected_values.get(k, "(any)")
+    for group, tag, val in zip(groups, tags, expected):
         out.setdefault(group, {})[tag] = val
-    return out
+    # Insert in display order; the template tab rows are built from this as-is.
+    return {g: {t: out[g][t] for t in _tags_sorted(out[g])} for g in _group_order_keys(out)}
 
 
-def _format_grouped_log_html(
-    grouped: Dict[str, Dict[str, str]],
-    style_for_key: Dict[str, Tuple[str, str]],
-    header_cls: str = "tc-dim",
-) -> str:
+def _build_required_expected(
+    soa: _ReqSoA,
+    expected_values: Dict[str, str],
+) -> Dict[str, str | None]:
+    """
+    {"Group.Tag": expected or None} for the required keys. Keyed by the full
+    dotted key like the keyset check, so group/tag names containing "." match.
     """
-    grouped: {Group: {Tag: Value}}
-    style_for_key maps "Group.Tag" -> (key_cls, val_cls)
+    fulls = soa[0]
+    return {k: expected_values.get(k) for k in fulls}
+
+
+def _pad_tag(tag: str, tag_w: int) -> str:
+    # Pads Tag so that the ":" column lines up across ALL groups inside one log.
+    return f"{tag:<{tag_w}}" if tag_w else tag
+
+
+@lru_cache(maxsize=4096)
+def _tag_cell(tag: str, tag_w: int) -> str:
+    """Escaped, padded tag label; the same tags recur across every extracted log."""
+    return _esc(_pad_tag(tag, tag_w))
+
+
+_TemplateRows = List[Tuple[str, List[Tuple[str, str, str, str]]]]
+
+
+def _build_template_rows(soa: _ReqSoA) -> _TemplateRows:
+    """
+    Template tab in display order:
+    [(Group, [(full key, escaped padded tag, expected, escaped expected)])].
+    Everything here depends only on the template; the per-file part is the
+    extracted value looked up while rendering.
+    """
+    grouped = _build_template_grouped(soa)
+    tag_w = max((len(t) for kv in grouped.values() for t in kv), default=0)
+    return [
+        (
+            group,
+            [(group + "." + tag, _tag_cell(tag, tag_w), exp, _esc(exp)) for tag, exp in kv.items()],
+        )
+        for group, kv in grouped.items()
+    ]
+
 
-    Alignment: pads Tag so that the ":" column lines up across ALL groups
-    inside this log (Template + Extracted).
+def _format_template_log_html(rows: _TemplateRows, flat: Dict[str, str]) -> str:
+    """Template tab: key green, value red on mismatch; both red if missing."""
+    flat_get = flat.get
+    buf: List[str] = []
+    for group, group_rows in rows:
+        buf.append(_group_header(group, _CLS_DIM))
+        for full, tag_html, exp, exp_html in group_rows:
+            got = flat_get(full)
+            if got is None:
+                k_open, v_open = _BAD_BAD
+            elif exp == "(any)" or got == exp:
+                k_open, v_open = _OK_OK
+            else:
+                k_open, v_open = _OK_BAD
+            buf.append(f"{k_open}{tag_html}{_CLOSE} : {v_open}{exp_html}{_CLOSE}\n")
+        buf.append("\n")
+    return "".join(buf).rstrip() + "\n"
+
+
+def _format_extracted_log_html(
+    filtered: Dict[str, Dict[str, str]],
+    req_expected: Dict[str, str | None],
+) -> str:
+    """
+    Extracted tab, classified and rendered in one pass over the filtered groups:
+    not required -> red; required with wrong value -> value red + expected note.
     """
-    tag_w = 0
-    for _g, _kv in (grouped or {}).items():
-        if isinstance(_kv, dict):
-            for _t in _kv.keys():
-                tag_w = max(tag_w, len(str(_t)))
+    tag_w = max((len(t) for kv in filtered.values() for t in kv), default=0)
 
+    esc = _esc
+    tag_cell = _tag_cell
     buf: List[str] = []
-    for group in _group_order_keys(grouped):
-        disp_group = group.replace(":", " / ")
-        buf.append(_span(f"--- {disp_group} ---", header_cls) + "\n")
-        kv = grouped[group]
+    for group in _group_order_keys(filtered):
+        kv = filtered[group]
+        if not kv:
+            continue
+        buf.append(_group_header(group, _CLS_DIM))
+        prefix = group + "."
         for tag in _tags_sorted(kv):
-            full = f"{group}.{tag}"
-            k_cls, v_cls = style_for_key.get(full, ("", ""))
-            disp_tag = f"{tag:<{tag_w}}" if tag_w else str(tag)
-            buf.append(_span(disp_tag, k_cls) + " : " + _span(kv[tag], v_cls) + "\n")
+            val = kv[tag]
+            full = prefix + tag
+            if full not in req_expected:
+                k_open, v_open = _BAD_BAD
+            else:
+                exp = req_expected[full]
+                if exp is None or val == exp:
+                    k_open, v_open = _OK_OK
+                else:
+                    k_open, v_open = _OK_BAD
+                    val = f"{val}  (expected: {exp})"
+            buf.append(f"{k_open}{tag_cell(tag, tag_w)}{_CLOSE} : {v_open}{esc(val)}{_CLOSE}\n")
         buf.append("\n")
     return "".join(buf).rstrip() + "\n"
 
@@ -219,22 +468,40 @@ def _format_grouped_log_html(
 # -----------------------------
 # Timestamp helpers
 # -----------------------------
-_DT_RE = re.compile(r"^(\d{4}):(\d{2}):(\d{2})\s+(\d{2}):(\d{2}):(\d{2})([+-]\d{2}):(\d{2})$")
-
-
+@lru_cache(maxsize=4096)
 def _parse_exif_dt(val: str | None) -> datetime | None:
+    """Parse ExifTool "YYYY:MM:DD HH:MM:SS+HH:MM" by slicing the fixed layout."""
     if not val:
         return None
     v = str(val).strip()
-    m = _DT_RE.match(v)
-    if not m:
+    if len(v) > 11 and v[10].isspace() and v[11].isspace():
+        # ExifTool prints one space between date and time; tolerate runs.
+        v = v[:10] + " " + v[11:].lstrip()
+    if (
+        len(v) != 25
+        or v[4] != ":"
+        or v[7] != ":"
+        or not v[10].isspace()
+        or v[13] != ":"
+        or v[16] != ":"
+        or v[19] not in "+-"
+        or v[22] != ":"
+    ):
+        return None
+    if not (v[0:4] + v[5:7] + v[8:10] + v[11:13] + v[14:16] + v[17:19] + v[20:22] + v[23:25]).isdecimal():
         return None
-    y, mo, d, hh, mm, ss, oh, om = m.groups()
-    oh_i = int(oh)
-    om_i = int(om)
+    oh_i = int(v[19:22])
+    om_i = int(v[23:25])
     off_min = (oh_i * 60) + (om_i if oh_i >= 0 else -om_i)
     tz = timezone(timedelta(minutes=off_min))
-    return datetime(int(y), int(mo), int(d), int(hh), int(mm), int(ss), tzinfo=tz)
+    return datetime(
+        int(v[0:4]), int(v[5:7]), int(v[8:10]), int(v[11:13]), int(v[14:16]), int(v[17:19]), tzinfo=tz
+    )
+
+
+@lru_cache(maxsize=16)
+def _zi(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
 
 
 def _fmt_ago(delta: timedelta) -> str:
@@ -265,9 +532,11 @@ def _fmt_ago(delta: timedelta) -> str:
 
 
 def _get_exif_value(exif_struct: Dict[str, Dict[str, str]], full_key: str) -> str | None:
-    if not full_key or "." not in full_key:
+    if not full_key:
+        return None
+    group, sep, tag = full_key.partition(".")
+    if not sep:
         return None
-    group, tag = full_key.split(".", 1)
     g = (exif_struct or {}).get(group)
     if not isinstance(g, dict):
         return None
@@ -284,7 +553,7 @@ def _timestamp_eval(exif_struct: Dict[str, Dict[str, str]], tpl: dict) -> dict |
 
     label = str(rule.get("label") or "Create/Modify")
     tz_name = str(rule.get("local_timezone") or "Asia/Tbilisi")
-    tz_local = ZoneInfo(tz_name)
+    tz_local = _zi(tz_name)
 
     compare_keys = list(rule.get("compare_keys") or ["PDF.CreateDate", "PDF.ModifyDate"])
     sent_from = str(rule.get("sent_from") or (compare_keys[0] if compare_keys else ""))
@@ -302,8 +571,13 @@ def _timestamp_eval(exif_struct: Dict[str, Dict[str, str]], tpl: dict) -> dict |
         match = None
 
     sent_str: str | None = None
-    raw_sent = _get_exif_value(exif_struct, sent_from) if sent_from else None
-    dt_sent = _parse_exif_dt(raw_sent) if raw_sent else None
+    if sent_from in compare_keys:
+        # Usually the first compare key: reuse the value fetched and parsed above.
+        i = compare_keys.index(sent_from)
+        raw_sent, dt_sent = raws[i][1], dts[i][1]
+    else:
+        raw_sent = _get_exif_value(exif_struct, sent_from) if sent_from else None
+        dt_sent = _parse_exif_dt(raw_sent) if raw_sent else None
     if dt_sent is not None:
         now_local = datetime.now(tz_local)
         sent_local = dt_sent.astimezone(tz_local)
@@ -331,6 +605,49 @@ def _timestamp_eval(exif_struct: Dict[str, Dict[str, str]], tpl: dict) -> dict |
     }
 
 
+def _parse_check_settings(tpl: dict) -> Tuple[frozenset, frozenset, bool, Tuple[str, ...], Dict[str, str]]:
+    """(ignore_groups, ignore_tags, strict, required_keys, expected_values) from the template."""
+    ignore = tpl.get("ignore") or {}
+    t_exif = tpl.get("exif") or {}
+    return (
+        frozenset(ignore.get("groups") or []),
+        frozenset(ignore.get("tags") or []),
+        bool(t_exif.get("strict_keyset", True)),
+        tuple(t_exif.get("required_keys") or []),
+        dict(t_exif.get("expected_values") or {}),
+    )
+
+
+def _rule_for_result(rule: Any) -> Any:
+    """Shallow copy of a template rule for the result dict.
+
+    Templates are shared through _TPL_CACHE, so handing out the rule itself
+    would let a caller's edits leak into every later check.
+    """
+    return dict(rule) if isinstance(rule, dict) else rule
+
+
+def _parse_size_rule(size_rule: dict) -> Tuple[float, float, float, bool, bool, str]:
+    """
+    (base, min_kb, max_kb, inclusive, enforce, range_tail) from file_size_kb_rule.
+    range_tail is the fixed " | range ... | from N pdfs" end of the size line.
+    """
+    min_kb = float(size_rule.get("min_kb"))
+    max_kb = float(size_rule.get("max_kb"))
+    sample_count = int(size_rule.get("sample_count", 0) or 0)
+    range_tail = f" | range {min_kb:.2f}–{max_kb:.2f} kB"
+    if sample_count > 0:
+        range_tail += f" | from {sample_count} pdfs"
+    return (
+        float(size_rule.get("base") or 1024),
+        min_kb,
+        max_kb,
+        bool(size_rule.get("inclusive", True)),
+        bool(size_rule.get("enforce", True)),
+        range_tail,
+    )
+
+
 # -----------------------------
 # Main check
 # -----------------------------
@@ -340,37 +657,55 @@ def run_template_check(
     template_id: str,
     file_size_bytes: Optional[int] = None,
     exif_text: Optional[str] = None,
+    render_html: bool = True,
 ) -> Dict[str, Any]:
+    """
+    Check one extracted ExifTool struct against the template.
+
+    render_html=False returns only the verdict/counts/key lists; the three
+    *_html and two raw_*_exif fields are None and none of the HTML is built.
+    """
     if template_id not in ALLOWED_TEMPLATE_IDS:
         raise ValueError(f"Template id not supported by ing engine: {template_id}")
     tpl = _load_template_by_id(template_id)
 
 
-    raw_template_exif = _strip_exiftool_headers(str(tpl.get("raw_template_exif") or "")).rstrip()
-    raw_uploaded_exif = _strip_exiftool_headers(exif_text or "").rstrip()
-    bank = tpl.get("bank", "?")
-    ignore_groups = set((tpl.get("ignore") or {}).get("groups") or [])
-    ignore_tags = set((tpl.get("ignore") or {}).get("tags") or [])
-
-    filtered = _filter_exif_struct(exif_struct, ignore_groups, ignore_tags)
-    flat = _flatten(filtered)
+    # Raw dumps only feed the HTML tabs.
+    raw_template_exif: str | None = None
+    raw_uploaded_exif: str | None = None
+    if render_html:
+        raw_template_exif = _strip_exiftool_headers(str(tpl.get("raw_template_exif") or "")).rstrip()
+        raw_uploaded_exif = _strip_exiftool_headers(exif_text or "").rstrip()
+    ignore_groups, ignore_tags, strict, required_keys, expected_values = _tpl_memo(
+        tpl, "_check_settings", lambda: _parse_check_settings(tpl)
+    )
 
-    t_exif = tpl.get("exif") or {}
-    strict = bool(t_exif.get("strict_keyset", True))
+    # The grouped view only feeds the Extracted tab, so skip it without HTML.
+    filtered, flat = _filter_and_flatten(exif_struct, ignore_groups, ignore_tags, keep_grouped=render_html)
 
-    required_keys: List[str] = list(t_exif.get("required_keys") or [])
-    required_set = set(required_keys)
-    expected_values: Dict[str, str] = dict(t_exif.get("expected_values") or {})
+    required_set: frozenset[str] = _tpl_memo(
+        tpl, "_required_set", lambda: frozenset(required_keys)
+    )
 
-    extracted_keys = set(flat.keys())
-    missing_keys = sorted(list(required_set - extracted_keys))
-    extra_keys = sorted(list(extracted_keys - required_set)) if strict else []
+    # Live keys view: set algebra works on it directly, no copy of the keyset.
+    extracted_keys = flat.keys()
+    missing_keys: List[str]
+    extra_keys: List[str]
+    if extracted_keys == required_set:
+        # Usual PASS case: one size check + containment pass, no diff sets to sort.
+        missing_keys, extra_keys = [], []
+    else:
+        missing_keys = sorted(required_set.difference(extracted_keys))
+        extra_keys = sorted(extracted_keys - required_set) if strict else []
 
+    flat_get = flat.get
     mismatches: List[Dict[str, str]] = []
-    for k, expected in expected_values.items():
-        got = flat.get(k, "(missing)")
-        if got != expected:
-            mismatches.append({"key": k, "expected": expected, "got": got})
+    # Usual PASS case: every expected pair is in flat, checked in one C-level pass.
+    if not expected_values.items() <= flat.items():
+        for k, expected in expected_values.items():
+            got = flat_get(k, "(missing)")
+            if got != expected:
+                mismatches.append({"key": k, "expected": expected, "got": got})
 
     ok = (len(missing_keys) == 0) and (len(extra_keys) == 0) and (len(mismatches) == 0)
 
@@ -385,26 +720,22 @@ def run_template_check(
     size_line_html: str | None = None
 
     if size_rule and file_size_bytes is not None:
-        base = float(size_rule.get("base") or 1024)
-        min_kb = float(size_rule.get("min_kb"))
-        max_kb = float(size_rule.get("max_kb"))
-        inclusive = bool(size_rule.get("inclusive", True))
-        enforce = bool(size_rule.get("enforce", True))
-        sample_count = int(size_rule.get("sample_count", 0) or 0)
+        base, min_kb, max_kb, inclusive, enforce, range_tail = _tpl_memo(
+            tpl, "_size_rule_parsed", lambda: _parse_size_rule(size_rule)
+        )
 
         kb = file_size_bytes / base
         kb = round(kb + 1e-9, 2)  # compare/display using 2dp (avoid float edge cases)
         inside = (min_kb <= kb <= max_kb) if inclusive else (min_kb < kb < max_kb)
         size_ok = bool(inside)
 
-        icon = "✅" if inside else "❌"
-        cls = "tc-ok" if inside else "tc-bad"
-
-        tail = f"{kb:.2f} kB {icon} ({file_size_bytes} bytes) | range {min_kb:.2f}–{max_kb:.2f} kB"
-        if sample_count > 0:
-            tail += f" | from {sample_count} pdfs"
+        if render_html:
+            icon = "✅" if inside else "❌"
+            cls = _CLS_OK if inside else _CLS_BAD
 
-        size_line_html = _kv("Size check", _span(tail, cls), None)
+            size_line_html = _kv(
+                "Size check", _span(f"{kb:.2f} kB {icon} ({file_size_bytes} bytes){range_tail}", cls), None
+            )
 
         if enforce and (not size_ok):
             ok = False
@@ -418,40 +749,58 @@ def run_template_check(
     missing_ok = (len(missing_keys) == 0)
     mismatch_ok = (len(mismatches) == 0)
 
+    result: Dict[str, Any] = {
+        "filename": filename,
+        "template_id": tpl.get("id"),
+        "template_path": tpl.get("_path"),
+        "status": "PASS" if ok else "FAIL",
+        "counts": {
+            "extracted_keys": extracted_count,
+            "template_keys": template_count,
+            "extra_keys": len(extra_keys),
+            "missing_keys": len(missing_keys),
+            "mismatches": len(mismatches),
+        },
+        "extra_keys": extra_keys,
+        "missing_keys": missing_keys,
+        "mismatches": mismatches,
+        "size_rule": (_rule_for_result(tpl.get("file_size_kb_rule")) if file_size_bytes is not None else None),
+        "size_ok": (size_ok if file_size_bytes is not None else None),
+        "report_html": None,
+        "template_html": None,
+        "extracted_html": None,
+        "raw_template_exif": raw_template_exif,
+        "raw_uploaded_exif": raw_uploaded_exif,
+    }
+    if not render_html:
+        return result
+
     # Report HTML (aligned)
-    status_cls = "tc-ok" if ok else "tc-bad"
+    status_cls = _CLS_OK if ok else _CLS_BAD
 
     report: List[str] = []
-    report.append(_esc("==== TEMPLATE CHECK (ExifTool) ====\n"))
+    report.append(_HDR_TEMPLATE_CHECK)
 
     report.append(_kv("File", _esc(filename)))
-    report.append(_kv("Template", _esc(f"{bank} / {tpl.get('id','?')}")))
+    template_line = _tpl_memo(
+        tpl, "_template_line_html", lambda: _kv("Template", _esc(f"{tpl.get('bank', '?')} / {tpl.get('id','?')}"))
+    )
+    report.append(template_line)
 
     status_tail_parts: list[str] = []
     if ts:
         if ts["match"] is True:
-            status_tail_parts.append(_span(f"{ts['label']} match", "tc-ok"))
+            status_tail_parts.append(_span(f"{ts['label']} match", _CLS_OK))
         elif ts["match"] is False:
-            status_tail_parts.append(_span(f"{ts['label']} mismatch", "tc-bad"))
+            status_tail_parts.append(_span(f"{ts['label']} mismatch", _CLS_BAD))
         if ts.get("sent_str"):
-            status_tail_parts.append(_span(ts["sent_str"], "tc-warn"))
-
-    tail_html = (" (" + ", ".join(status_tail_parts) + ")") if status_tail_parts else ""
-    report.append(
-        _span(f"{'Status':<{_KEY_W}}:", status_cls)
-        + " "
-        + _span(("PASS ✅" if ok else "FAIL ❌"), status_cls)
-        + "\n"
-    )
+            status_tail_parts.append(_span(ts["sent_str"], _CLS_WARN))
+
+    report.append(_kv("Status", _span(("PASS ✅" if ok else "FAIL ❌"), status_cls), status_cls))
 
     # Split timestamp summary into its own line (was previously appended to Status)
     if status_tail_parts:
-        report.append(
-            _span(f"{'Dates':<{_KEY_W}}:", None)
-            + " "
-            + tail_html.strip()
-            + "\n"
-        )
+        report.append(_kv("Dates", f"({', '.join(status_tail_parts)})"))
 
     if file_size_bytes is not None:
         if size_line_html is not None:
@@ -460,138 +809,50 @@ def run_template_check(
             report.append(_kv("Size", _esc(f"{_human_kb(file_size_bytes)} ({file_size_bytes} bytes)")))
 
     report.append("\n")
-    report.append(_esc("---- COUNTS (meaningful keys, after ignores) ----\n"))
-
-    report.append(
-        _span(f"{'Meta count':<{_KEY_W}}:", None)
-        + " "
-        + _esc(f"{template_count}/")
-        + _span(str(extracted_count), "tc-ok" if meta_ok else "tc-bad")
-        + "\n"
-    )
-    report.append(
-        _span(f"{'Extra keys':<{_KEY_W}}:", None)
-        + " "
-        + _esc("0/")
-        + _span(str(len(extra_keys)), "tc-ok" if extra_ok else "tc-bad")
-        + "\n"
-    )
-    report.append(
-        _span(f"{'Missing keys':<{_KEY_W}}:", None)
-        + " "
-        + _esc("0/")
-        + _span(str(len(missing_keys)), "tc-ok" if missing_ok else "tc-bad")
-        + "\n"
-    )
-    report.append(
-        _span(f"{'Value mismatches':<{_KEY_W}}:", None)
-        + " "
-        + _esc("0/")
-        + _span(str(len(mismatches)), "tc-ok" if mismatch_ok else "tc-bad")
-        + "\n"
-    )
+    report.append(_HDR_COUNTS)
+
+    for label, want, got_n, good in (
+        ("Meta count", template_count, extracted_count, meta_ok),
+        ("Extra keys", 0, len(extra_keys), extra_ok),
+        ("Missing keys", 0, len(missing_keys), missing_ok),
+        ("Value mismatches", 0, len(mismatches), mismatch_ok),
+    ):
+        report.append(_kv(label, f"{want}/{_span(str(got_n), _CLS_OK if good else _CLS_BAD)}"))
 
     if ts:
         if ts["match"] is True:
-            ts_cls = "tc-ok"
+            ts_cls = _CLS_OK
         elif ts["match"] is False:
-            ts_cls = "tc-bad"
+            ts_cls = _CLS_BAD
         else:
-            ts_cls = "tc-warn"
+            ts_cls = _CLS_WARN
         report.append(_kv(ts["label"], _span(ts["detail"], ts_cls)))
 
     report.append("\n")
 
-    if extra_keys:
-        report.append(_span("EXTRA KEYS:", "tc-bad") + "\n")
-        for k in extra_keys:
-            report.append(_span(f"- {k}", "tc-bad") + "\n")
-    else:
-        report.append(_span("EXTRA KEYS:", "tc-ok") + " " + _span("(none)", "tc-ok") + "\n")
-
-    report.append("\n")
-
-    if missing_keys:
-        report.append(_span("MISSING KEYS:", "tc-bad") + "\n")
-        for k in missing_keys:
-            report.append(_span(f"- {k}", "tc-bad") + "\n")
+    if not (extra_keys or missing_keys or mismatches):
+        report.append(_NONE_SECTIONS)
     else:
-        report.append(_span("MISSING KEYS:", "tc-ok") + " " + _span("(none)", "tc-ok") + "\n")
-
-    report.append("\n")
-
-    if mismatches:
-        report.append(_span("VALUE MISMATCHES:", "tc-bad") + "\n")
-        for mm in mismatches:
-            report.append(_span(f"- {mm['key']}: expected={mm['expected']} | got={mm['got']}", "tc-bad") + "\n")
-    else:
-        report.append(_span("VALUE MISMATCHES:", "tc-ok") + " " + _span("(none)", "tc-ok") + "\n")
+        _emit_list_section(report, _EXTRA_SECTION, extra_keys)
+        report.append("\n")
+        _emit_list_section(report, _MISSING_SECTION, missing_keys)
+        report.append("\n")
+        mismatch_lines = [f"{mm['key']}: expected={mm['expected']} | got={mm['got']}" for mm in mismatches]
+        _emit_list_section(report, _MISMATCH_SECTION, mismatch_lines)
 
     report_html = "".join(report).rstrip() + "\n"
 
-    # Template tab HTML (key green, value red on mismatch; both red if missing)
-    template_grouped = _build_template_grouped(required_keys, expected_values)
-    template_style: Dict[str, Tuple[str, str]] = {}
-    for k in required_keys:
-        exp = expected_values.get(k, "(any)")
-        got = flat.get(k)
-        if got is None:
-            template_style[k] = ("tc-bad", "tc-bad")
-        else:
-            if exp == "(any)" or got == exp:
-                template_style[k] = ("tc-ok", "tc-ok")
-            else:
-                template_style[k] = ("tc-ok", "tc-bad")
-
-    template_html = _format_grouped_log_html(template_grouped, template_style)
-
-    # Extracted tab HTML
-    extracted_style: Dict[str, Tuple[str, str]] = {}
-    extracted_with_expected_note: Dict[str, Dict[str, str]] = {}
-    for group, kv in filtered.items():
-        out_kv: Dict[str, str] = {}
-        for tag, val in kv.items():
-            full = f"{group}.{tag}"
-            if full not in required_set:
-                extracted_style[full] = ("tc-bad", "tc-bad")
-                out_kv[tag] = val
-            else:
-                exp = expected_values.get(full)
-                if exp is None:
-                    extracted_style[full] = ("tc-ok", "tc-ok")
-                    out_kv[tag] = val
-                else:
-                    if val == exp:
-                        extracted_style[full] = ("tc-ok", "tc-ok")
-                        out_kv[tag] = val
-                    else:
-                        extracted_style[full] = ("tc-ok", "tc-bad")
-                        out_kv[tag] = f"{val}  (expected: {exp})"
-        if out_kv:
-            extracted_with_expected_note[group] = out_kv
+    # Template / Extracted tabs: one streaming pass each, no intermediate style maps
+    req_soa: _ReqSoA = _tpl_memo(tpl, "_req_soa", lambda: _build_req_soa(required_keys, expected_values))
+    template_rows: _TemplateRows = _tpl_memo(tpl, "_template_rows", lambda: _build_template_rows(req_soa))
+    template_html = _format_template_log_html(template_rows, flat)
 
-    extracted_html = _format_grouped_log_html(extracted_with_expected_note, extracted_style)
+    req_expected: Dict[str, str | None] = _tpl_memo(
+        tpl, "_req_expected", lambda: _build_required_expected(req_soa, expected_values)
+    )
+    extracted_html = _format_extracted_log_html(filtered, req_expected)
 
-    return {
-        "filename": filename,
-        "template_id": tpl.get("id"),
-        "template_path": tpl.get("_path"),
-        "status": "PASS" if ok else "FAIL",
-        "counts": {
-            "extracted_keys": extracted_count,
-            "template_keys": template_count,
-            "extra_keys": len(extra_keys),
-            "missing_keys": len(missing_keys),
-            "mismatches": len(mismatches),
-        },
-        "extra_keys": extra_keys,
-        "missing_keys": missing_keys,
-        "mismatches": mismatches,
-        "size_rule": (tpl.get("file_size_kb_rule") if file_size_bytes is not None else None),
-        "size_ok": (size_ok if file_size_bytes is not None else None),
-        "report_html": report_html,
-        "template_html": template_html,
-        "extracted_html": extracted_html,
-        "raw_template_exif": raw_template_exif,
-        "raw_uploaded_exif": raw_uploaded_exif,
-    }
+    result["report_html"] = report_html
+    result["template_html"] = template_html
+    result["extracted_html"] = extracted_html
+    return result
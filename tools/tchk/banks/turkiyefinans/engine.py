@@ -17,23 +17,24 @@ def run_template_check(
     template_id: str,
     file_size_bytes: Optional[int] = None,
     exif_text: Optional[str] = None,
+    render_html: bool = True,
 ) -> Dict[str, Any]:
     tid = (template_id or "").strip().upper()
     if tid in ("", "TURKIYEFINANS_AUTO_V1", "TURKIYEFINANS_MAIN_V1"):
         tid = "TURKIYEFINANS_AUTO_V1"
 
     if tid == "TURKIYEFINANS_CHROMIUM_V1":
-        return chromium_check(exif_struct, filename, tid, file_size_bytes=file_size_bytes, exif_text=exif_text)
+        return chromium_check(exif_struct, filename, tid, file_size_bytes=file_size_bytes, exif_text=exif_text, render_html=render_html)
     if tid == "TURKIYEFINANS_IOS_V1":
-        return ios_check(exif_struct, filename, tid, file_size_bytes=file_size_bytes, exif_text=exif_text)
+        return ios_check(exif_struct, filename, tid, file_size_bytes=file_size_bytes, exif_text=exif_text, render_html=render_html)
 
     if tid != "TURKIYEFINANS_AUTO_V1":
         raise ValueError(f"Template id not supported by Türkiye Finans engine: {tid}")
 
     v = detect_variant(exif_struct)
     if v == "CHROMIUM":
-        return chromium_check(exif_struct, filename, "TURKIYEFINANS_CHROMIUM_V1", file_size_bytes=file_size_bytes, exif_text=exif_text)
+        return chromium_check(exif_struct, filename, "TURKIYEFINANS_CHROMIUM_V1", file_size_bytes=file_size_bytes, exif_text=exif_text, render_html=render_html)
     if v == "IOS":
-        return ios_check(exif_struct, filename, "TURKIYEFINANS_IOS_V1", file_size_bytes=file_size_bytes, exif_text=exif_text)
+        return ios_check(exif_struct, filename, "TURKIYEFINANS_IOS_V1", file_size_bytes=file_size_bytes, exif_text=exif_text, render_html=render_html)
 
     raise ValueError("Türkiye Finans: could not detect variant (expected Chromium or iOS).")
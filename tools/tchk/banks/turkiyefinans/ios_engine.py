@@ -13,6 +13,7 @@ def run_template_check(
     template_id: str,
     file_size_bytes: Optional[int] = None,
     exif_text: Optional[str] = None,
+    render_html: bool = True,
 ) -> Dict[str, Any]:
     msg = (
         "Türkiye Finans iOS template is not implemented yet. "
@@ -29,9 +30,9 @@ def run_template_check(
         "mismatches": [{"key": "(ios)", "expected": "implemented", "got": msg}],
         "size_rule": None,
         "size_ok": None,
-        "report_html": f"==== TEMPLATE CHECK (ExifTool) ====\nFile            : {filename}\nTemplate        : {BANK_NAME} / {DEFAULT_TEMPLATE_ID}\nStatus          : FAIL ❌\n\n{msg}\n",
-        "template_html": msg + "\n",
-        "extracted_html": msg + "\n",
-        "raw_template_exif": "",
-        "raw_uploaded_exif": exif_text or "",
+        "report_html": f"==== TEMPLATE CHECK (ExifTool) ====\nFile            : {filename}\nTemplate        : {BANK_NAME} / {DEFAULT_TEMPLATE_ID}\nStatus          : FAIL ❌\n\n{msg}\n" if render_html else None,
+        "template_html": msg + "\n" if render_html else None,
+        "extracted_html": msg + "\n" if render_html else None,
+        "raw_template_exif": "" if render_html else None,
+        "raw_uploaded_exif": (exif_text or "") if render_html else None,
     }
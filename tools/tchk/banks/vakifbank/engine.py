@@ -24,19 +24,20 @@ def run_template_check(
     template_id: str,
     file_size_bytes: Optional[int] = None,
     exif_text: Optional[str] = None,
+    render_html: bool = True,
 ) -> Dict[str, Any]:
     tid = (template_id or "").strip().upper()
 
     # If caller explicitly requests a variant template, honor it.
     if tid.startswith("VAKIFBANK_CHROMIUM_"):
         from .chromium_engine import run_template_check as _run
-        res = _run(exif_struct, filename, template_id, file_size_bytes, exif_text)
+        res = _run(exif_struct, filename, template_id, file_size_bytes, exif_text, render_html)
         res["vakif_variant"] = "chromium"
         return res
 
     if tid.startswith("VAKIFBANK_IOS_"):
         from .ios_engine import run_template_check as _run
-        res = _run(exif_struct, filename, template_id, file_size_bytes, exif_text)
+        res = _run(exif_struct, filename, template_id, file_size_bytes, exif_text, render_html)
         res["vakif_variant"] = "ios"
         return res
 
@@ -46,7 +47,7 @@ def run_template_check(
 
     if variant == "ios":
         from .ios_engine import run_template_check as _run
-        res = _run(exif_struct, filename, "VAKIFBANK_IOS_V1", file_size_bytes, exif_text)
+        res = _run(exif_struct, filename, "VAKIFBANK_IOS_V1", file_size_bytes, exif_text, render_html)
         res["vakif_variant"] = "ios"
         res["vakif_variant_reason"] = det.get("reason", "")
         res["vakif_producer"] = det.get("producer", "")
@@ -55,7 +56,7 @@ def run_template_check(
 
     # Default to Chromium for safety (current working behavior).
     from .chromium_engine import run_template_check as _run
-    res = _run(exif_struct, filename, "VAKIFBANK_CHROMIUM_V1", file_size_bytes, exif_text)
+    res = _run(exif_struct, filename, "VAKIFBANK_CHROMIUM_V1", file_size_bytes, exif_text, render_html)
     res["vakif_variant"] = ("chromium" if variant in ("chromium", "unknown") else variant)
     res["vakif_variant_reason"] = det.get("reason", "")
     res["vakif_producer"] = det.get("producer", "")
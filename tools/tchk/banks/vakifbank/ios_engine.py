@@ -16,14 +16,21 @@ Fixes vs previous buggy version:
   - Report line is colored green/red like other banks.
 """
 
-import html
 import json
+import os
 import re
+import sys
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
+try:  # optional: faster template JSON parsing when orjson is installed
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 BANK_NAME = "Vakifbank"
 ENGINE_NAME = "vakifbank_ios"
 
@@ -32,6 +39,22 @@ ALLOWED_TEMPLATE_IDS = ["VAKIFBANK_IOS_V1"]
 
 _KEY_W = 16
 
+# CSS classes used by the report/tabs. Interned once so the style dicts and
+# _span() calls share the same objects.
+_CLS_OK = sys.intern("tc-ok")
+_CLS_BAD = sys.intern("tc-bad")
+_CLS_WARN = sys.intern("tc-warn")
+_CLS_DIM = sys.intern("tc-dim")
+
+# Tab rows are formatted straight from these opening tags instead of two
+# _span() calls per line; (key, value) style pairs are shared per row.
+_OPEN_OK = f'<span class="{_CLS_OK}">'
+_OPEN_BAD = f'<span class="{_CLS_BAD}">'
+_CLOSE = "</span>"
+_OK_OK = (_OPEN_OK, _OPEN_OK)
+_OK_BAD = (_OPEN_OK, _OPEN_BAD)
+_BAD_BAD = (_OPEN_BAD, _OPEN_BAD)
+
 
 # -----------------------------
 # Template loading
@@ -48,121 +71,278 @@ BASE_DIR = _find_base_dir()
 META_TEMPLATES_DIR = BASE_DIR / "meta_templates" / "vakifbank"
 
 
-def _load_template_by_id(template_id: str) -> dict:
-    if not META_TEMPLATES_DIR.exists():
-        raise FileNotFoundError("meta_templates/vakifbank/ folder not found")
+# Parsed templates keyed by (path, st_mtime_ns): editing a template on disk
+# changes its mtime, so the next check re-reads it.
+_TPL_CACHE: Dict[Tuple[str, int], dict] = {}
+# template id -> json path, filled by one scandir walk on first use (and on misses).
+_ID_INDEX: Dict[str, str] = {}
+_META_TEMPLATES_STR = str(META_TEMPLATES_DIR)
+
+
+def _read_template(path: str) -> dict:
+    key = (path, os.stat(path).st_mtime_ns)
+    data = _TPL_CACHE.get(key)
+    if data is None:
+        with open(path, "rb") as f:
+            data = _json_loads(f.read())
+        data["_path"] = key[0]
+        for stale in [k for k in _TPL_CACHE if k[0] == key[0]]:
+            del _TPL_CACHE[stale]
+        _TPL_CACHE[key] = data
+    return data
+
 
-    for path in META_TEMPLATES_DIR.rglob("*.json"):
+def _iter_template_files(root: str):
+    """*.json files under root, depth-first like rglob, via os.scandir."""
+    subdirs: List[str] = []
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name.endswith(".json") and entry.is_file():
+                    yield entry.path
+    except OSError:
+        return
+    for d in subdirs:
+        yield from _iter_template_files(d)
+
+
+def _index_templates() -> None:
+    _ID_INDEX.clear()
+    for path in _iter_template_files(_META_TEMPLATES_STR):
         try:
-            data = json.loads(path.read_text(encoding="utf-8"))
+            data = _read_template(path)
         except Exception:
             continue
-        if data.get("id") == template_id:
-            data["_path"] = str(path)
-            return data
+        _ID_INDEX.setdefault(data.get("id"), path)
+
+
+def _load_template_by_id(template_id: str) -> dict:
+    path = _ID_INDEX.get(template_id)
+    if path is not None:
+        try:
+            data = _read_template(path)
+            if data.get("id") == template_id:
+                return data
+        except Exception:
+            pass  # removed, renamed or broken since indexed -> rescan
+
+    # Only checked on a miss: a cached hit implies the folder is there.
+    if not os.path.exists(_META_TEMPLATES_STR):
+        raise FileNotFoundError("meta_templates/vakifbank/ folder not found")
+
+    _index_templates()
+    path = _ID_INDEX.get(template_id)
+    if path is not None:
+        return _read_template(path)
 
     raise FileNotFoundError(f"Template id not found: {template_id}")
 
 
+def _tpl_memo(tpl: dict, key: str, build: Callable[[], Any]) -> Any:
+    """Data derived only from the template, kept on the cached template dict.
+
+    A template edited on disk is re-read into a fresh dict, which drops these.
+    """
+    value = tpl.get(key)
+    if value is None:
+        value = tpl[key] = build()
+    return value
+
+
 # -----------------------------
 # HTML helpers
 # -----------------------------
+# Same output as html.escape(..., quote=False), in a single pass.
+_ESC_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
 def _esc(s: Any) -> str:
-    return html.escape("" if s is None else str(s), quote=False)
+    if s is None:
+        return ""
+    s = str(s)
+    if "&" not in s and "<" not in s and ">" not in s:
+        return s
+    return s.translate(_ESC_TABLE)
 
 
 def _span(text: str, cls: str | None = None) -> str:
+    # _esc inlined: this runs once per rendered key and value.
+    s = "" if text is None else text if type(text) is str else str(text)
+    if "&" in s or "<" in s or ">" in s:
+        s = s.translate(_ESC_TABLE)
     if cls:
-        return f'<span class="{cls}">{_esc(text)}</span>'
-    return _esc(text)
+        return f'<span class="{cls}">{s}</span>'
+    return s
+
+
+@lru_cache(maxsize=512)
+def _group_header(group: str, cls: str | None = None) -> str:
+    """Escaped "--- Group ---" line; group names repeat across every check."""
+    disp_group = group.replace(":", " / ")
+    return f'{_span(f"--- {disp_group} ---", cls)}\n'
 
 
 def _kv(label: str, value_html: str, label_cls: str | None = None) -> str:
-    return _span(f"{label:<{_KEY_W}}:", label_cls) + " " + value_html + "\n"
+    return f"{_kv_label(label, label_cls)} {value_html}\n"
+
+
+@lru_cache(maxsize=64)
+def _kv_label(label: str, label_cls: str | None) -> str:
+    # Labels are a small fixed set, so the padded/escaped form is memoized.
+    return _span(f"{label:<{_KEY_W}}:", label_cls)
+
+
+def _section_lines(title: str) -> Tuple[str, str]:
+    """(failing header line, passing "(none)" line) for a report list section."""
+    return (
+        f"{_span(title, _CLS_BAD)}\n",
+        f'{_span(title, _CLS_OK)} {_span("(none)", _CLS_OK)}\n',
+    )
+
+
+# Fixed report fragments, already HTML-safe.
+_HDR_TEMPLATE_CHECK = "==== TEMPLATE CHECK (ExifTool) ====\n"
+_HDR_COUNTS = "---- COUNTS (meaningful keys, after ignores) ----\n"
+_EXTRA_SECTION = _section_lines("EXTRA KEYS:")
+_MISSING_SECTION = _section_lines("MISSING KEYS:")
+_MISMATCH_SECTION = _section_lines("VALUE MISMATCHES:")
+# The three sections when there is nothing to list, as one prebuilt fragment.
+_NONE_SECTIONS = f"{_EXTRA_SECTION[1]}\n{_MISSING_SECTION[1]}\n{_MISMATCH_SECTION[1]}"
+
+
+def _emit_list_section(
+    buf: List[str], section: Tuple[str, str], items: List[str]
+) -> None:
+    """Append header plus one red "- item" line per item, or the "(none)" line."""
+    hdr, none_line = section
+    if not items:
+        buf.append(none_line)
+        return
+    buf.append(hdr)
+    buf.extend([f"{_OPEN_BAD}- {_esc(it)}{_CLOSE}\n" for it in items])
 
 
 def _human_kb(n_bytes: int) -> str:
     return f"{(n_bytes/1024.0):.2f} kB"
 
 
+_EXIFTOOL_HDR = "---- ExifTool ----"
+
+
 def _strip_exiftool_headers(raw: str) -> str:
     if not raw:
         return ""
-    lines = raw.splitlines(True)
+    n = len(raw)
+
+    def line_end(i: int) -> int:
+        e = raw.find("\n", i)
+        return n if e < 0 else e + 1
+
+    # Copy untouched text as slices; only lines around a header hit are inspected.
     out: list[str] = []
-    i = 0
-    while i < len(lines):
-        if lines[i].strip() == "---- ExifTool ----":
-            j = i + 1
-            while j < len(lines) and lines[j].strip() == "":
-                j += 1
-            if j < len(lines):
-                nxt = lines[j].lstrip()
-                if nxt.startswith("ExifTool Version") or nxt.startswith(
-                    "ExifToolVersion"
-                ):
-                    k = j + 1
-                    while k < len(lines) and lines[k].strip() != "":
-                        k += 1
-                    while k < len(lines) and lines[k].strip() == "":
-                        k += 1
-                    i = k
-                    continue
-        out.append(lines[i])
-        i += 1
+    pos = 0
+    hit = raw.find(_EXIFTOOL_HDR)
+    while hit >= 0:
+        start = raw.rfind("\n", 0, hit) + 1
+        resume = line_end(hit)
+        if raw[start:resume].strip() == _EXIFTOOL_HDR:
+            j = resume
+            while j < n and not raw[j : line_end(j)].strip():
+                j = line_end(j)
+            if j < n and (
+                raw[j : line_end(j)]
+                .lstrip()
+                .startswith(("ExifTool Version", "ExifToolVersion"))
+            ):
+                k = line_end(j)
+                while k < n and raw[k : line_end(k)].strip():
+                    k = line_end(k)
+                while k < n and not raw[k : line_end(k)].strip():
+                    k = line_end(k)
+                out.append(raw[pos:start])
+                pos = resume = k
+        hit = raw.find(_EXIFTOOL_HDR, resume)
+    out.append(raw[pos:])
     return "".join(out).lstrip("\n")
 
 
 # -----------------------------
 # Exif struct filtering / flattening
 # -----------------------------
-def _filter_exif_struct(
+def _filter_and_flatten(
     exif_struct: Dict[str, Dict[str, str]],
-    ignore_groups: set[str],
-    ignore_tags: set[str],
-) -> Dict[str, Dict[str, str]]:
-    out: Dict[str, Dict[str, str]] = {}
+    ignore_groups: frozenset[str],
+    ignore_tags: frozenset[str],
+    keep_grouped: bool = True,
+) -> Tuple[Dict[str, Dict[str, str]], Dict[str, str]]:
+    """Apply template ignores and flatten in a single pass.
+
+    Returns (grouped, flat): {Group: {Tag: Value}} and {"Group.Tag": Value}.
+    grouped stays empty when keep_grouped is False.
+    """
+    grouped: Dict[str, Dict[str, str]] = {}
+    flat: Dict[str, str] = {}
     for group, kv in (exif_struct or {}).items():
         if group in ignore_groups:
             continue
         if not isinstance(kv, dict):
             continue
+
+        if type(group) is not str:
+            group = str(group)
+        prefix = group + "."
+        if (not ignore_tags or ignore_tags.isdisjoint(kv)) and all(
+            type(t) is str and type(v) is str for t, v in kv.items()
+        ):
+            # Nothing to drop or coerce: reuse the group dict instead of copying it.
+            for tag, val in kv.items():
+                flat[prefix + tag] = val
+            if keep_grouped and kv:
+                grouped[group] = kv
+            continue
+
         g_out: Dict[str, str] = {}
         for tag, val in kv.items():
-            if str(tag) in ignore_tags:
+            if type(tag) is not str:
+                tag = str(tag)
+            if tag in ignore_tags:
                 continue
-            g_out[str(tag)] = "" if val is None else str(val)
-        if g_out:
-            out[str(group)] = g_out
-    return out
-
+            if type(val) is not str:
+                val = "" if val is None else str(val)
+            flat[prefix + tag] = val
+            if keep_grouped:
+                g_out[tag] = val
 
-def _flatten(grouped: Dict[str, Dict[str, str]]) -> Dict[str, str]:
-    flat: Dict[str, str] = {}
-    for group, kv in grouped.items():
-        for tag, val in kv.items():
-            flat[f"{group}.{tag}"] = val
-    return flat
+        if g_out:
+            grouped[group] = g_out
+    return grouped, flat
 
 
 # -----------------------------
 # Duplicate PDFVersion parser (from RAW ExifTool)
 # -----------------------------
-_RE_PDF_BLOCK = re.compile(r"^----\s+PDF\s+----\s*$", re.MULTILINE)
-_RE_BLOCK_HDR = re.compile(r"^----\s+.+?\s+----\s*$", re.MULTILINE)
+_PDF_BLOCK_HDR = "---- PDF ----"
 _RE_PDFVERSION_LINE = re.compile(r"^PDFVersion\s*:\s*(.+?)\s*$", re.MULTILINE)
 
 
 def _extract_pdf_block(raw_uploaded_exif: str) -> str:
     if not raw_uploaded_exif:
         return ""
-    m = _RE_PDF_BLOCK.search(raw_uploaded_exif)
-    if not m:
+    # Literal header search (line-anchored) instead of a MULTILINE regex scan.
+    if raw_uploaded_exif.startswith(_PDF_BLOCK_HDR):
+        i = 0
+    else:
+        i = raw_uploaded_exif.find("\n" + _PDF_BLOCK_HDR)
+        if i < 0:
+            return ""
+        i += 1
+    start = raw_uploaded_exif.find("\n", i)
+    if start < 0:
         return ""
-    start = m.end()
-    m2 = _RE_BLOCK_HDR.search(raw_uploaded_exif, start)
-    end = m2.start() if m2 else len(raw_uploaded_exif)
-    return raw_uploaded_exif[start:end]
+    end = raw_uploaded_exif.find("\n---- ", start)
+    return raw_uploaded_exif[start:end] if end >= 0 else raw_uploaded_exif[start:]
 
 
 def _extract_pdfversions(raw_uploaded_exif: str) -> List[str]:
@@ -176,33 +356,54 @@ def _extract_pdfversions(raw_uploaded_exif: str) -> List[str]:
 # -----------------------------
 # Timestamp helpers (same behavior as other banks)
 # -----------------------------
-_DT_OFF_RE = re.compile(
-    r"^(\d{4}):(\d{2}):(\d{2})\s+(\d{2}):(\d{2}):(\d{2})([+-]\d{2}):(\d{2})$"
-)
-_DT_Z_RE = re.compile(r"^(\d{4}):(\d{2}):(\d{2})\s+(\d{2}):(\d{2}):(\d{2})Z$")
-
-
+@lru_cache(maxsize=4096)
 def _parse_exif_dt(val: str | None) -> datetime | None:
+    """Parse ExifTool "YYYY:MM:DD HH:MM:SS" + "Z" or "+HH:MM" by slicing."""
     if not val:
         return None
     v = str(val).strip()
+    if len(v) > 11 and v[10].isspace() and v[11].isspace():
+        # ExifTool prints one space between date and time; tolerate runs.
+        v = v[:10] + " " + v[11:].lstrip()
+    if (
+        len(v) < 20
+        or v[4] != ":"
+        or v[7] != ":"
+        or not v[10].isspace()
+        or v[13] != ":"
+        or v[16] != ":"
+    ):
+        return None
 
-    mz = _DT_Z_RE.match(v)
-    if mz:
-        y, mo, d, hh, mm, ss = mz.groups()
-        return datetime(
-            int(y), int(mo), int(d), int(hh), int(mm), int(ss), tzinfo=timezone.utc
-        )
-
-    m = _DT_OFF_RE.match(v)
-    if not m:
+    fields = v[0:4] + v[5:7] + v[8:10] + v[11:13] + v[14:16] + v[17:19]
+    if len(v) == 20 and v[19] == "Z" and fields.isdecimal():
+        tz = timezone.utc
+    elif (
+        len(v) == 25
+        and v[19] in "+-"
+        and v[22] == ":"
+        and (fields + v[20:22] + v[23:25]).isdecimal()
+    ):
+        oh_i = int(v[19:22])
+        om_i = int(v[23:25])
+        off_min = (oh_i * 60) + (om_i if oh_i >= 0 else -om_i)
+        tz = timezone(timedelta(minutes=off_min))
+    else:
         return None
-    y, mo, d, hh, mm, ss, oh, om = m.groups()
-    oh_i = int(oh)
-    om_i = int(om)
-    off_min = (oh_i * 60) + (om_i if oh_i >= 0 else -om_i)
-    tz = timezone(timedelta(minutes=off_min))
-    return datetime(int(y), int(mo), int(d), int(hh), int(mm), int(ss), tzinfo=tz)
+    return datetime(
+        int(v[0:4]),
+        int(v[5:7]),
+        int(v[8:10]),
+        int(v[11:13]),
+        int(v[14:16]),
+        int(v[17:19]),
+        tzinfo=tz,
+    )
+
+
+@lru_cache(maxsize=16)
+def _zi(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
 
 
 def _fmt_ago(delta: timedelta) -> str:
@@ -232,9 +433,11 @@ def _fmt_ago(delta: timedelta) -> str:
 def _get_exif_value(
     exif_struct: Dict[str, Dict[str, str]], full_key: str
 ) -> str | None:
-    if not full_key or "." not in full_key:
+    if not full_key:
+        return None
+    group, sep, tag = full_key.partition(".")
+    if not sep:
         return None
-    group, tag = full_key.split(".", 1)
     g = (exif_struct or {}).get(group)
     if not isinstance(g, dict):
         return None
@@ -251,7 +454,7 @@ def _timestamp_eval(exif_struct: Dict[str, Dict[str, str]], tpl: dict) -> dict |
 
     label = str(rule.get("label") or "Create/Modify")
     tz_name = str(rule.get("local_timezone") or "Asia/Tbilisi")
-    tz_local = ZoneInfo(tz_name)
+    tz_local = _zi(tz_name)
 
     compare_keys = list(
         rule.get("compare_keys") or ["PDF.CreateDate", "PDF.ModifyDate"]
@@ -272,8 +475,13 @@ def _timestamp_eval(exif_struct: Dict[str, Dict[str, str]], tpl: dict) -> dict |
         match = None
 
     sent_str: str | None = None
-    raw_sent = _get_exif_value(exif_struct, sent_from) if sent_from else None
-    dt_sent = _parse_exif_dt(raw_sent) if raw_sent else None
+    if sent_from in compare_keys:
+        # Usually the first compare key: reuse the value fetched and parsed above.
+        i = compare_keys.index(sent_from)
+        raw_sent, dt_sent = raws[i][1], dts[i][1]
+    else:
+        raw_sent = _get_exif_value(exif_struct, sent_from) if sent_from else None
+        dt_sent = _parse_exif_dt(raw_sent) if raw_sent else None
     if dt_sent is not None:
         now_local = datetime.now(tz_local)
         sent_local = dt_sent.astimezone(tz_local)
@@ -301,25 +509,39 @@ def _timestamp_eval(exif_struct: Dict[str, Dict[str, str]], tpl: dict) -> dict |
     }
 
 
+def _parse_check_settings(tpl: dict) -> tuple:
+    """
+    (ignore_groups, ignore_tags, strict, required_keys, expected_values),
+    resolved once per template.
+    """
+    ignore = tpl.get("ignore") or {}
+    t_exif = tpl.get("exif") or {}
+    return (
+        frozenset(ignore.get("groups") or []),
+        frozenset(ignore.get("tags") or []),
+        bool(t_exif.get("strict_keyset", True)),
+        tuple(t_exif.get("required_keys") or []),
+        dict(t_exif.get("expected_values") or {}),
+    )
+
+
 # -----------------------------
 # File size KB rule (min/max)
 # -----------------------------
-def _size_kb_eval(file_size_bytes: int | None, tpl: dict) -> dict | None:
-    """
-    File-size KB check (min/max range, inclusive).
+def _rule_for_result(rule: Any) -> Any:
+    """Shallow copy of a template rule for the result dict.
 
-    Preferred template format:
-
-      "file_size_kb_rule": {
-        "enabled": true,
-        "min_kb": 68.03,
-        "max_kb": 70.52,
-        "sample_count": 3
-      }
+    Templates are shared through _TPL_CACHE, so handing out the rule itself
+    would let a caller's edits leak into every later check.
+    """
+    return dict(rule) if isinstance(rule, dict) else rule
 
-    Back-compat (stats-only) is also supported:
 
-      "file_size_kb_stats": {"count": 3, "min": 68.03, "max": 70.52, "avg": 69.67}
+def _parse_size_rule(tpl: dict) -> tuple:
+    """
+    Template part of the size check, resolved once per template:
+    (rule, min_kb, max_kb, sample_count, min_cmp, max_cmp, bounds_ok, range_str,
+    detail_tail, line_tail), or () when the template has no enabled size rule.
     """
     rule = tpl.get("file_size_kb_rule") or None
 
@@ -333,15 +555,95 @@ def _size_kb_eval(file_size_bytes: int | None, tpl: dict) -> dict | None:
                 "sample_count": stats.get("count"),
             }
         else:
-            return None
+            return ()
 
     if isinstance(rule, dict) and rule.get("enabled") is False:
-        return None
+        return ()
 
     min_kb = rule.get("min_kb") if isinstance(rule, dict) else None
     max_kb = rule.get("max_kb") if isinstance(rule, dict) else None
     sample_count = rule.get("sample_count") if isinstance(rule, dict) else None
 
+    # Parse the bounds once; they feed both the check and the display strings.
+    try:
+        min_f = None if min_kb is None else float(min_kb)
+        max_f = None if max_kb is None else float(max_kb)
+        bounds_ok = True
+    except Exception:
+        min_f = max_f = None
+        bounds_ok = False
+
+    # The check compares 2-decimal kB values, so round the bounds the same way.
+    min_cmp = None if min_f is None else round(min_f + 1e-9, 2)
+    max_cmp = None if max_f is None else round(max_f + 1e-9, 2)
+
+    range_str: str | None = None
+    if (min_f is not None) and (max_f is not None):
+        range_str = f"range {min_f:.2f}–{max_f:.2f} kB"
+    elif min_f is not None:
+        range_str = f"min {min_f:.2f} kB"
+    elif max_f is not None:
+        range_str = f"max {max_f:.2f} kB"
+
+    # Fixed " | range ... | from N pdfs" ends of the detail and report lines.
+    tail: list[str] = [range_str] if range_str else []
+    count_ok = True
+    if sample_count is not None:
+        try:
+            tail.append(f"from {int(sample_count)} pdfs")
+        except Exception:
+            tail.append(f"from {sample_count} pdfs")
+            count_ok = False
+    line_tail = "".join(f" | {t}" for t in tail)
+    detail_tail = line_tail if (bounds_ok and count_ok) else ""
+
+    return (
+        rule,
+        min_kb,
+        max_kb,
+        sample_count,
+        min_cmp,
+        max_cmp,
+        bounds_ok,
+        range_str,
+        detail_tail,
+        line_tail,
+    )
+
+
+def _size_kb_eval(file_size_bytes: int | None, tpl: dict) -> dict | None:
+    """
+    File-size KB check (min/max range, inclusive).
+
+    Preferred template format:
+
+      "file_size_kb_rule": {
+        "enabled": true,
+        "min_kb": 68.03,
+        "max_kb": 70.52,
+        "sample_count": 3
+      }
+
+    Back-compat (stats-only) is also supported:
+
+      "file_size_kb_stats": {"count": 3, "min": 68.03, "max": 70.52, "avg": 69.67}
+    """
+    parsed = _tpl_memo(tpl, "_size_rule_parsed", lambda: _parse_size_rule(tpl))
+    if not parsed:
+        return None
+    (
+        rule,
+        min_kb,
+        max_kb,
+        sample_count,
+        min_cmp,
+        max_cmp,
+        bounds_ok,
+        range_str,
+        detail_tail,
+        line_tail,
+    ) = parsed
+
     if file_size_bytes is None:
         return {
             "label": "Size check",
@@ -351,7 +653,9 @@ def _size_kb_eval(file_size_bytes: int | None, tpl: dict) -> dict | None:
             "min_kb": min_kb,
             "max_kb": max_kb,
             "sample_count": sample_count,
+            "range": range_str,
             "detail": "(file size missing)",
+            "line_tail": line_tail,
             "rule": rule,
         }
 
@@ -359,29 +663,15 @@ def _size_kb_eval(file_size_bytes: int | None, tpl: dict) -> dict | None:
     # IMPORTANT: Compare using the same 2-decimal value we display.
     kb = round(kb_raw + 1e-9, 2)
 
-    ok: bool | None = True
-    try:
-        if min_kb is not None and kb < round(float(min_kb) + 1e-9, 2):
-            ok = False
-        if max_kb is not None and kb > round(float(max_kb) + 1e-9, 2):
-            ok = False
-    except Exception:
-        ok = None
+    ok: bool | None = None
+    if bounds_ok:
+        ok = not (
+            (min_cmp is not None and kb < min_cmp)
+            or (max_cmp is not None and kb > max_cmp)
+        )
 
     # Fallback detail
-    try:
-        tail: list[str] = []
-        if (min_kb is not None) and (max_kb is not None):
-            tail.append(f"range {float(min_kb):.2f}–{float(max_kb):.2f} kB")
-        elif min_kb is not None:
-            tail.append(f"min {float(min_kb):.2f} kB")
-        elif max_kb is not None:
-            tail.append(f"max {float(max_kb):.2f} kB")
-        if sample_count is not None:
-            tail.append(f"from {int(sample_count)} pdfs")
-        detail = f"{kb:.2f} kB" + ((" | " + " | ".join(tail)) if tail else "")
-    except Exception:
-        detail = f"{kb:.2f} kB"
+    detail = f"{kb:.2f} kB{detail_tail}"
 
     return {
         "label": "Size check",
@@ -391,7 +681,9 @@ def _size_kb_eval(file_size_bytes: int | None, tpl: dict) -> dict | None:
         "min_kb": min_kb,
         "max_kb": max_kb,
         "sample_count": sample_count,
+        "range": range_str,
         "detail": detail,
+        "line_tail": line_tail,
         "rule": rule,
     }
 
@@ -407,38 +699,54 @@ _GROUP_ORDER = [
     "ICC_Profile:ICC-view",
     "ICC_Profile:ICC-meas",
 ]
+_GROUP_ORDER_SET = frozenset(_GROUP_ORDER)
 
 
-def _format_grouped_log_html(
-    grouped: Dict[str, Dict[str, str]],
-    style: Dict[str, Tuple[str, str]],
-) -> str:
-    tag_w = 0
-    for _, kv in (grouped or {}).items():
-        if isinstance(kv, dict):
-            for t in kv.keys():
-                tag_w = max(tag_w, len(str(t)))
+def _parse_required_keys(
+    required_keys: Tuple[str, ...],
+    expected_values: Dict[str, str],
+) -> List[Tuple[str, str, str, str]]:
+    """(full key, group, display tag, expected) per required key.
+
+    PDFVersion#N is shown as "PDFVersion (PDFVersion#N)" in both tabs.
+    """
+    out: List[Tuple[str, str, str, str]] = []
+    for k in required_keys:
+        group, _, tag = k.partition(".")
+        if tag.startswith("PDFVersion#"):
+            tag = f"PDFVersion ({tag})"
+        out.append((k, group, tag, expected_values.get(k, "(any)")))
+    return out
 
-    def emit_group(group: str, kv: Dict[str, str], buf: List[str]) -> None:
-        disp_group = group.replace(":", " / ")
-        buf.append(_span(f"--- {disp_group} ---", "tc-dim") + "\n")
-        for tag, val in kv.items():
-            full = f"{group}.{tag}"
-            k_cls, v_cls = style.get(full, ("", ""))
-            buf.append(
-                _span(f"{tag:<{tag_w}}", k_cls) + " : " + _span(val, v_cls) + "\n"
-            )
-        buf.append("\n")
 
-    buf: List[str] = []
-    for g in _GROUP_ORDER:
-        if g in grouped:
-            emit_group(g, grouped[g], buf)
-    for g in grouped.keys():
-        if g not in _GROUP_ORDER:
-            emit_group(g, grouped[g], buf)
+_TabRows = List[Tuple[str, List[Tuple[str, str, str, str]]]]
 
-    return "".join(buf).rstrip() + "\n"
+
+def _build_tab_rows(parsed_keys: List[Tuple[str, str, str, str]]) -> _TabRows:
+    """
+    Rows shared by the Template and Extracted tabs, in display order:
+    [(Group, [(full key, escaped padded display tag, expected, escaped expected)])].
+
+    Groups follow _GROUP_ORDER, then any others in template order. Tags are
+    padded so the ":" column lines up across all groups.
+    """
+    grouped: Dict[str, Dict[str, Tuple[str, str]]] = {}
+    for k, group, tag, exp in parsed_keys:
+        grouped.setdefault(group, {})[tag] = (k, exp)
+
+    tag_w = max((len(t) for kv in grouped.values() for t in kv), default=0)
+    order = [g for g in _GROUP_ORDER if g in grouped]
+    order += [g for g in grouped if g not in _GROUP_ORDER_SET]
+    return [
+        (
+            g,
+            [
+                (k, _esc(f"{tag:<{tag_w}}"), exp, _esc(exp))
+                for tag, (k, exp) in grouped[g].items()
+            ],
+        )
+        for g in order
+    ]
 
 
 # -----------------------------
@@ -450,7 +758,14 @@ def run_template_check(
     template_id: str,
     file_size_bytes: Optional[int] = None,
     exif_text: Optional[str] = None,
+    render_html: bool = True,
 ) -> Dict[str, Any]:
+    """
+    Check one extracted ExifTool struct against the iOS template.
+
+    render_html=False returns only the verdict/counts/key lists; the three
+    *_html and two raw_*_exif fields are None and none of the HTML is built.
+    """
     tid = (template_id or "").strip().upper()
     if tid in ("", "VAKIFBANK_AUTO_V1", "VAKIFBANK_MAIN_V1"):
         tid = DEFAULT_TEMPLATE_ID
@@ -459,16 +774,23 @@ def run_template_check(
 
     tpl = _load_template_by_id(tid)
 
-    raw_template_exif = _strip_exiftool_headers(
-        str(tpl.get("raw_template_exif") or "").rstrip()
-    )
+    # The uploaded dump is also parsed for PDFVersion; the template one is
+    # only shown in the HTML tabs.
+    raw_template_exif: str | None = None
+    if render_html:
+        raw_template_exif = _strip_exiftool_headers(
+            str(tpl.get("raw_template_exif") or "").rstrip()
+        )
     raw_uploaded_exif = _strip_exiftool_headers(str(exif_text or "").rstrip())
 
-    ignore_groups = set((tpl.get("ignore") or {}).get("groups") or [])
-    ignore_tags = set((tpl.get("ignore") or {}).get("tags") or [])
+    ignore_groups, ignore_tags, strict, required_keys, expected_values = _tpl_memo(
+        tpl, "_check_settings", lambda: _parse_check_settings(tpl)
+    )
 
-    filtered = _filter_exif_struct(exif_struct, ignore_groups, ignore_tags)
-    flat = _flatten(filtered)
+    # Tabs are rebuilt from required_keys below, so only the flat view is needed.
+    _, flat = _filter_and_flatten(
+        exif_struct, ignore_groups, ignore_tags, keep_grouped=False
+    )
 
     # IMPORTANT: remove single structured PDFVersion key from keyset comparison.
     # We only want the two raw occurrences.
@@ -481,16 +803,21 @@ def run_template_check(
     if len(pdf_versions) >= 2:
         flat["PDF.PDFVersion#2"] = pdf_versions[1]
 
-    t_exif = tpl.get("exif") or {}
-    strict = bool(t_exif.get("strict_keyset", True))
-    required_keys: List[str] = list(t_exif.get("required_keys") or [])
-    required_set = set(required_keys)
-    expected_values: Dict[str, str] = dict(t_exif.get("expected_values") or {})
-
-    extracted_keys = set(flat.keys())
-    missing_keys = sorted(list(required_set - extracted_keys))
-    extra_keys = sorted(list(extracted_keys - required_set)) if strict else []
+    required_set: frozenset[str] = _tpl_memo(
+        tpl, "_required_set", lambda: frozenset(required_keys)
+    )
+    # Live keys view: set algebra works on it directly, no copy of the keyset.
+    extracted_keys = flat.keys()
+    missing_keys: List[str]
+    extra_keys: List[str]
+    if extracted_keys == required_set:
+        # Usual PASS case: one size check + containment pass, no diff sets to sort.
+        missing_keys, extra_keys = [], []
+    else:
+        missing_keys = sorted(required_set.difference(extracted_keys))
+        extra_keys = sorted(extracted_keys - required_set) if strict else []
 
+    flat_get = flat.get
     mismatches: List[Dict[str, str]] = []
 
     # Producer rule: variable version/build
@@ -505,15 +832,17 @@ def run_template_check(
             }
         )
 
-    # Exact checks for the rest
-    for k, expected in expected_values.items():
-        if k == "PDF.Producer":
-            continue
-        got = flat.get(k)
-        if got is None:
-            continue
-        if got != expected:
-            mismatches.append({"key": k, "expected": expected, "got": got})
+    # Exact checks for the rest; skipped when every expected pair is in flat
+    # (one C-level containment pass, the usual PASS case).
+    if not expected_values.items() <= flat.items():
+        for k, expected in expected_values.items():
+            if k == "PDF.Producer":
+                continue
+            got = flat_get(k)
+            if got is None:
+                continue
+            if got != expected:
+                mismatches.append({"key": k, "expected": expected, "got": got})
 
     ok = (len(missing_keys) == 0) and (len(extra_keys) == 0) and (len(mismatches) == 0)
 
@@ -527,279 +856,187 @@ def run_template_check(
     if size_eval and size_eval.get("fail"):
         ok = False
 
+    result: Dict[str, Any] = {
+        "filename": filename,
+        "template_id": tid,
+        "template_path": tpl.get("_path"),
+        "status": "PASS" if ok else "FAIL",
+        "counts": {
+            "extracted_keys": len(extracted_keys),
+            "template_keys": len(required_set),
+            "extra_keys": len(extra_keys),
+            "missing_keys": len(missing_keys),
+            "mismatches": len(mismatches),
+        },
+        "extra_keys": extra_keys,
+        "missing_keys": missing_keys,
+        "mismatches": mismatches,
+        "size_rule": (_rule_for_result(size_eval.get("rule")) if size_eval else None),
+        "size_ok": (size_eval.get("ok") if size_eval else None),
+        "report_html": None,
+        "template_html": None,
+        "extracted_html": None,
+        "raw_template_exif": raw_template_exif,
+        "raw_uploaded_exif": raw_uploaded_exif if render_html else None,
+    }
+    if not render_html:
+        return result
+
     # -----------------------------
     # Report HTML (counts + status)
     # -----------------------------
     report: List[str] = []
-    report.append(_esc("==== TEMPLATE CHECK (ExifTool) ====\n"))
+    report.append(_HDR_TEMPLATE_CHECK)
     report.append(_kv("File", _esc(filename)))
-    report.append(_kv("Template", _esc(f"{tpl.get('bank','?')} / {tpl.get('id','?')}")))
+    template_line = _tpl_memo(
+        tpl,
+        "_template_line_html",
+        lambda: _kv(
+            "Template", _esc(f"{tpl.get('bank','?')} / {tpl.get('id','?')}")
+        ),
+    )
+    report.append(template_line)
 
-    status_cls = "tc-ok" if ok else "tc-bad"
+    status_cls = _CLS_OK if ok else _CLS_BAD
     report.append(
-        _span(f"{'Status':<{_KEY_W}}:", status_cls)
-        + " "
-        + _span(("PASS ✅" if ok else "FAIL ❌"), status_cls)
-        + "\n"
+        _kv("Status", _span(("PASS ✅" if ok else "FAIL ❌"), status_cls), status_cls)
     )
 
     if ts:
         tail: list[str] = []
         if ts["match"] is True:
-            tail.append(_span("Create/Modify match", "tc-ok"))
+            tail.append(_span("Create/Modify match", _CLS_OK))
         elif ts["match"] is False:
-            tail.append(_span("Create/Modify mismatch", "tc-bad"))
+            tail.append(_span("Create/Modify mismatch", _CLS_BAD))
         else:
-            tail.append(_span("Create/Modify unknown", "tc-warn"))
+            tail.append(_span("Create/Modify unknown", _CLS_WARN))
         if ts.get("sent_str"):
-            tail.append(_span(ts["sent_str"], "tc-warn"))
-        report.append(
-            _span(f"{'Dates':<{_KEY_W}}:", None) + " (" + ", ".join(tail) + ")\n"
-        )
+            tail.append(_span(ts["sent_str"], _CLS_WARN))
+        report.append(_kv("Dates", f"({', '.join(tail)})"))
 
     # Size line (matches other banks)
     if size_eval:
         ok_sz = size_eval.get("ok")
-        cls_sz = "tc-warn" if ok_sz is None else ("tc-ok" if ok_sz else "tc-bad")
+        cls_sz = _CLS_WARN if ok_sz is None else (_CLS_OK if ok_sz else _CLS_BAD)
         icon = "⚠️" if ok_sz is None else ("✅" if ok_sz else "❌")
 
-        kb_disp = size_eval.get("kb")
-        if kb_disp is None and file_size_bytes is not None:
-            kb_disp = round((file_size_bytes / 1024.0) + 1e-9, 2)
-
-        pieces: list[str] = []
-        if kb_disp is not None and file_size_bytes is not None:
-            pieces.append(f"{kb_disp:.2f} kB {icon} ({file_size_bytes} bytes)")
-        elif file_size_bytes is not None:
-            pieces.append(
-                f"{_human_kb(file_size_bytes)} {icon} ({file_size_bytes} bytes)"
-            )
+        # kb is set whenever the file size is known (see _size_kb_eval).
+        kb = size_eval.get("kb")
+        if kb is not None:
+            head = f"{kb:.2f} kB {icon} ({file_size_bytes} bytes)"
         else:
-            pieces.append(size_eval.get("detail") or "(file size missing)")
-
-        min_kb = size_eval.get("min_kb")
-        max_kb = size_eval.get("max_kb")
-        scount = size_eval.get("sample_count")
-
-        try:
-            if (min_kb is not None) and (max_kb is not None):
-                pieces.append(f"range {float(min_kb):.2f}–{float(max_kb):.2f} kB")
-            elif min_kb is not None:
-                pieces.append(f"min {float(min_kb):.2f} kB")
-            elif max_kb is not None:
-                pieces.append(f"max {float(max_kb):.2f} kB")
-        except Exception:
-            pass
-
-        if scount is not None:
-            try:
-                pieces.append(f"from {int(scount)} pdfs")
-            except Exception:
-                pieces.append(f"from {scount} pdfs")
-
-        report.append(_kv("Size check", _span(" | ".join(pieces), cls_sz)))
+            head = size_eval.get("detail") or "(file size missing)"
+        line = head + size_eval["line_tail"]
+        report.append(_kv("Size check", _span(line, cls_sz)))
     elif file_size_bytes is not None:
         report.append(
             _kv("Size", _esc(f"{_human_kb(file_size_bytes)} ({file_size_bytes} bytes)"))
         )
 
     report.append("\n")
-    report.append(_esc("---- COUNTS (meaningful keys, after ignores) ----\n"))
+    report.append(_HDR_COUNTS)
 
     extra_ok = len(extra_keys) == 0
     missing_ok = len(missing_keys) == 0
     mismatch_ok = len(mismatches) == 0
 
     meta_ok = len(extracted_keys) >= len(required_set)
-    report.append(
-        _span(f"{'Meta count':<{_KEY_W}}:", None)
-        + " "
-        + _esc(f"{len(required_set)}/")
-        + _span(str(len(extracted_keys)), "tc-ok" if meta_ok else "tc-bad")
-        + "\n"
-    )
-    report.append(
-        _span(f"{'Extra keys':<{_KEY_W}}:", None)
-        + " "
-        + _esc("0/")
-        + _span(str(len(extra_keys)), "tc-ok" if extra_ok else "tc-bad")
-        + "\n"
-    )
-    report.append(
-        _span(f"{'Missing keys':<{_KEY_W}}:", None)
-        + " "
-        + _esc("0/")
-        + _span(str(len(missing_keys)), "tc-ok" if missing_ok else "tc-bad")
-        + "\n"
-    )
-    report.append(
-        _span(f"{'Value mismatches':<{_KEY_W}}:", None)
-        + " "
-        + _esc("0/")
-        + _span(str(len(mismatches)), "tc-ok" if mismatch_ok else "tc-bad")
-        + "\n"
-    )
+    for label, want, got_n, good in (
+        ("Meta count", len(required_set), len(extracted_keys), meta_ok),
+        ("Extra keys", 0, len(extra_keys), extra_ok),
+        ("Missing keys", 0, len(missing_keys), missing_ok),
+        ("Value mismatches", 0, len(mismatches), mismatch_ok),
+    ):
+        cls = _CLS_OK if good else _CLS_BAD
+        report.append(_kv(label, f"{want}/{_span(str(got_n), cls)}"))
 
     if ts:
         ts_cls = (
-            "tc-ok"
+            _CLS_OK
             if ts["match"] is True
-            else ("tc-bad" if ts["match"] is False else "tc-warn")
+            else (_CLS_BAD if ts["match"] is False else _CLS_WARN)
         )
         report.append(_kv(ts["label"], _span(ts["detail"], ts_cls)))
 
     report.append("\n")
 
-    if extra_keys:
-        report.append(_span("EXTRA KEYS:", "tc-bad") + "\n")
-        for k in extra_keys:
-            report.append(_span(f"- {k}", "tc-bad") + "\n")
-    else:
-        report.append(
-            _span("EXTRA KEYS:", "tc-ok") + " " + _span("(none)", "tc-ok") + "\n"
-        )
-
-    report.append("\n")
-    if missing_keys:
-        report.append(_span("MISSING KEYS:", "tc-bad") + "\n")
-        for k in missing_keys:
-            report.append(_span(f"- {k}", "tc-bad") + "\n")
-    else:
-        report.append(
-            _span("MISSING KEYS:", "tc-ok") + " " + _span("(none)", "tc-ok") + "\n"
-        )
-
-    report.append("\n")
-    if mismatches:
-        report.append(_span("VALUE MISMATCHES:", "tc-bad") + "\n")
-        for mm in mismatches:
-            report.append(
-                _span(
-                    f"- {mm['key']}: expected={mm['expected']} | got={mm['got']}",
-                    "tc-bad",
-                )
-                + "\n"
-            )
+    if not (extra_keys or missing_keys or mismatches):
+        report.append(_NONE_SECTIONS)
     else:
-        report.append(
-            _span("VALUE MISMATCHES:", "tc-ok") + " " + _span("(none)", "tc-ok") + "\n"
-        )
+        _emit_list_section(report, _EXTRA_SECTION, extra_keys)
+        report.append("\n")
+        _emit_list_section(report, _MISSING_SECTION, missing_keys)
+        report.append("\n")
+        mismatch_lines = [
+            f"{mm['key']}: expected={mm['expected']} | got={mm['got']}"
+            for mm in mismatches
+        ]
+        _emit_list_section(report, _MISMATCH_SECTION, mismatch_lines)
 
     report_html = "".join(report).rstrip() + "\n"
 
     # -----------------------------
-    # Template tab HTML
+    # Template + Extracted tab HTML
     # -----------------------------
-    template_grouped: Dict[str, Dict[str, str]] = {}
-    extracted_grouped: Dict[str, Dict[str, str]] = {}
-
-    for k in required_keys:
-        group, tag = k.split(".", 1)
-        template_grouped.setdefault(group, {})
-        extracted_grouped.setdefault(group, {})
-
-        if tag.startswith("PDFVersion#"):
-            disp_tag = f"PDFVersion ({tag})"
-            template_grouped[group][disp_tag] = expected_values.get(k, "(any)")
-            extracted_grouped[group][disp_tag] = flat.get(k, "(missing)")
-        else:
-            template_grouped[group][tag] = expected_values.get(k, "(any)")
-            extracted_grouped[group][tag] = flat.get(k, "(missing)")
-
-    template_style: Dict[str, Tuple[str, str]] = {}
-    for k in required_keys:
-        exp = expected_values.get(k, "(any)")
-        got = flat.get(k)
-        if got is None:
-            style_key = k
-            if k.startswith("PDF.PDFVersion#"):
-                style_key = f"PDF.PDFVersion ({k.split('.',1)[1]})"
-            template_style[style_key] = ("tc-bad", "tc-bad")
-        else:
-            ok_val = (
-                (exp == "(any)") or (k == "PDF.Producer" and prod_ok) or (got == exp)
-            )
-            style_key = k
-            if k.startswith("PDF.PDFVersion#"):
-                style_key = f"PDF.PDFVersion ({k.split('.',1)[1]})"
-            template_style[style_key] = (
-                ("tc-ok", "tc-ok") if ok_val else ("tc-ok", "tc-bad")
-            )
-
-    normalized_template_style: Dict[str, Tuple[str, str]] = {}
-    for full, pair in template_style.items():
-        if "." in full:
-            normalized_template_style[full] = pair
-
-    template_html = _format_grouped_log_html(
-        template_grouped, normalized_template_style
+    # Both tabs show the same rows; render them together in one pass.
+    parsed_keys: List[Tuple[str, str, str, str]] = _tpl_memo(
+        tpl,
+        "_parsed_keys",
+        lambda: _parse_required_keys(required_keys, expected_values),
+    )
+    tab_rows: _TabRows = _tpl_memo(
+        tpl, "_tab_rows", lambda: _build_tab_rows(parsed_keys)
     )
 
-    # -----------------------------
-    # Extracted tab HTML
-    # -----------------------------
-    extracted_style: Dict[str, Tuple[str, str]] = {}
-    extracted_with_expected_note: Dict[str, Dict[str, str]] = {}
-
-    for group, kv in extracted_grouped.items():
-        out_kv: Dict[str, str] = {}
-        for tag, _val in kv.items():
-            if tag.startswith("PDFVersion (PDFVersion#"):
-                internal = f"PDF.{tag[len('PDFVersion ('):-1]}"
+    esc = _esc
+    template_buf: List[str] = []
+    extracted_buf: List[str] = []
+    for group, rows in tab_rows:
+        header = _group_header(group, _CLS_DIM)
+        template_buf.append(header)
+        extracted_buf.append(header)
+        for k, tag_html, exp, exp_html in rows:
+            got = flat_get(k)
+
+            # Template tab: key green, value red on mismatch; both red if missing.
+            if got is None:
+                t_key, t_val = _BAD_BAD
+            elif (exp == "(any)") or (k == "PDF.Producer" and prod_ok) or (got == exp):
+                t_key, t_val = _OK_OK
             else:
-                internal = f"{group}.{tag}"
+                t_key, t_val = _OK_BAD
 
-            exp = expected_values.get(internal, "(any)")
-            got = flat.get(internal)
-
-            if internal == "PDF.Producer":
+            # Extracted tab: the uploaded value, with the expectation on mismatch.
+            if k == "PDF.Producer":
+                shown = got if got is not None else "(missing)"
                 if prod_ok:
-                    extracted_style[f"{group}.{tag}"] = ("tc-ok", "tc-ok")
-                    out_kv[tag] = got if got is not None else "(missing)"
+                    e_key, e_val = _OK_OK
                 else:
-                    extracted_style[f"{group}.{tag}"] = ("tc-ok", "tc-bad")
-                    out_kv[tag] = (
-                        f"{got if got is not None else '(missing)'} (expected {exp})"
-                    )
-                continue
-
-            if got is None:
-                extracted_style[f"{group}.{tag}"] = ("tc-bad", "tc-bad")
-                out_kv[tag] = "(missing)"
+                    e_key, e_val = _OK_BAD
+                    shown = f"{shown} (expected {exp})"
+            elif got is None:
+                e_key, e_val = _BAD_BAD
+                shown = "(missing)"
+            elif exp == "(any)" or got == exp:
+                e_key, e_val = _OK_OK
+                shown = got
             else:
-                if exp == "(any)" or got == exp:
-                    extracted_style[f"{group}.{tag}"] = ("tc-ok", "tc-ok")
-                    out_kv[tag] = got
-                else:
-                    extracted_style[f"{group}.{tag}"] = ("tc-ok", "tc-bad")
-                    out_kv[tag] = f"{got} (expected {exp})"
+                e_key, e_val = _OK_BAD
+                shown = f"{got} (expected {exp})"
 
-        extracted_with_expected_note[group] = out_kv
+            template_buf.append(
+                f"{t_key}{tag_html}{_CLOSE} : {t_val}{exp_html}{_CLOSE}\n"
+            )
+            extracted_buf.append(
+                f"{e_key}{tag_html}{_CLOSE} : {e_val}{esc(shown)}{_CLOSE}\n"
+            )
+        template_buf.append("\n")
+        extracted_buf.append("\n")
 
-    extracted_html = _format_grouped_log_html(
-        extracted_with_expected_note, extracted_style
-    )
+    template_html = "".join(template_buf).rstrip() + "\n"
+    extracted_html = "".join(extracted_buf).rstrip() + "\n"
 
-    return {
-        "filename": filename,
-        "template_id": tid,
-        "template_path": tpl.get("_path"),
-        "status": "PASS" if ok else "FAIL",
-        "counts": {
-            "extracted_keys": len(extracted_keys),
-            "template_keys": len(required_set),
-            "extra_keys": len(extra_keys),
-            "missing_keys": len(missing_keys),
-            "mismatches": len(mismatches),
-        },
-        "extra_keys": extra_keys,
-        "missing_keys": missing_keys,
-        "mismatches": mismatches,
-        "size_rule": (size_eval.get("rule") if size_eval else None),
-        "size_ok": (size_eval.get("ok") if size_eval else None),
-        "report_html": report_html,
-        "template_html": template_html,
-        "extracted_html": extracted_html,
-        "raw_template_exif": raw_template_exif,
-        "raw_uploaded_exif": raw_uploaded_exif,
-    }
+    result["report_html"] = report_html
+    result["template_html"] = template_html
+    result["extracted_html"] = extracted_html
+    return result
@@ -21,24 +21,35 @@ Detection signals (robust, case-insensitive):
 from typing import Any, Dict, Optional
 
 
-def _find_value_ci(exif_struct: Dict[str, Dict[str, Any]], tag_name: str) -> Optional[str]:
+def _lower_tag_index(exif_struct: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Search exif_struct for a tag by name (case-insensitive) across all groups.
-    Returns the first found value as a string.
+    Map lowercased tag name -> first value seen for it across all groups.
+    Built once per detection so each lookup is a dict hit, not a full scan.
     """
+    index: Dict[str, Any] = {}
     if not exif_struct:
-        return None
+        return index
 
-    want = tag_name.strip().lower()
     for _group, kv in exif_struct.items():
         if not isinstance(kv, dict):
             continue
         for k, v in kv.items():
-            if str(k).strip().lower() == want:
-                if v is None:
-                    return ""
-                return str(v)
-    return None
+            index.setdefault(str(k).strip().lower(), v)
+    return index
+
+
+def _find_value_ci(index: Dict[str, Any], tag_name: str) -> Optional[str]:
+    """
+    Look up a tag by name (case-insensitive) in a _lower_tag_index() result.
+    Returns the first found value as a string.
+    """
+    want = tag_name.strip().lower()
+    if want not in index:
+        return None
+    v = index[want]
+    if v is None:
+        return ""
+    return str(v)
 
 
 def detect_vakif_variant(exif_struct: Dict[str, Dict[str, Any]], exif_text: str | None = None) -> Dict[str, str]:
@@ -51,13 +62,20 @@ def detect_vakif_variant(exif_struct: Dict[str, Dict[str, Any]], exif_text: str
         "creator": "..."
       }
     """
-    producer = _find_value_ci(exif_struct, "Producer") or ""
-    creator = _find_value_ci(exif_struct, "Creator") or ""
+    tags = _lower_tag_index(exif_struct)
+    producer = _find_value_ci(tags, "Producer") or ""
+    creator = _find_value_ci(tags, "Creator") or ""
     prod_l = producer.lower().strip()
     creat_l = creator.lower().strip()
 
     # --- iOS Quartz signals ---
-    if "quartz pdfcontext" in prod_l or prod_l.startswith("ios version") or "pdfcontext" in prod_l and "quartz" in prod_l:
+    # Cheap prefix test first; the split-word check still catches producers like
+    # "Mac OS X ... Quartz ... PDFContext" that the exact phrase misses.
+    if (
+        prod_l.startswith("ios version")
+        or "quartz pdfcontext" in prod_l
+        or ("pdfcontext" in prod_l and "quartz" in prod_l)
+    ):
         return {
             "variant": "ios",
             "reason": "Producer indicates iOS Quartz PDFContext",
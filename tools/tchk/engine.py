@@ -5,10 +5,45 @@ from __future__ import annotations
 Separate engines per bank so each bank's logic is isolated.
 Public API stays stable:
 
-    run_template_check(exif_struct, filename, template_id, file_size_bytes=None, exif_text=None)
+    run_template_check(exif_struct, filename, template_id, file_size_bytes=None, exif_text=None,
+                       render_html=True)
+
+render_html=False skips building the report/template/extracted HTML (and the
+stripped raw ExifTool dumps) for callers that only need status and counts.
+
+Batch form (results in input order):
+
+    run_template_checks(items, render_html=True)
 """
 
-from typing import Any, Dict, Optional
+from importlib import import_module
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+# Template id prefix (up to the first "_") -> bank package under .banks
+_BANK_MODULES: Dict[str, str] = {
+    "TEB": "teb",
+    "GARANTI": "garanti",
+    "ENPARA": "enpara",
+    "ING": "ing",
+    "AKBANK": "akbank",
+    "DENIZBANK": "denizbank",
+    "VAKIFBANK": "vakifbank",
+    "TURKIYEFINANS": "turkiyefinans",
+}
+
+# Resolved bank runners, filled on first use of each bank.
+_BANK_RUNNERS: Dict[str, Callable[..., Dict[str, Any]]] = {}
+
+
+def _get_runner(prefix: str) -> Optional[Callable[..., Dict[str, Any]]]:
+    run = _BANK_RUNNERS.get(prefix)
+    if run is None:
+        bank = _BANK_MODULES.get(prefix)
+        if bank is None:
+            return None
+        run = import_module(f".banks.{bank}.engine", __package__).run_template_check
+        _BANK_RUNNERS[prefix] = run
+    return run
 
 
 def run_template_check(
@@ -17,39 +52,42 @@ def run_template_check(
     template_id: str,
     file_size_bytes: Optional[int] = None,
     exif_text: Optional[str] = None,
+    render_html: bool = True,
 ) -> Dict[str, Any]:
     tid = (template_id or "").upper()
 
-    if tid.startswith("TEB_"):
-        from .banks.teb.engine import run_template_check as _run
-        return _run(exif_struct, filename, template_id, file_size_bytes, exif_text)
-
-    if tid.startswith("GARANTI_"):
-        from .banks.garanti.engine import run_template_check as _run
-        return _run(exif_struct, filename, template_id, file_size_bytes, exif_text)
-
-    if tid.startswith("ENPARA_"):
-        from .banks.enpara.engine import run_template_check as _run
-        return _run(exif_struct, filename, template_id, file_size_bytes, exif_text)
+    prefix, sep, _ = tid.partition("_")
+    run = _get_runner(prefix) if sep else None
+    if run is not None:
+        return run(exif_struct, filename, template_id, file_size_bytes, exif_text, render_html)
 
-    if tid.startswith("ING_"):
-        from .banks.ing.engine import run_template_check as _run
-        return _run(exif_struct, filename, template_id, file_size_bytes, exif_text)
-
-    if tid.startswith("AKBANK_"):
-        from .banks.akbank.engine import run_template_check as _run
-        return _run(exif_struct, filename, template_id, file_size_bytes, exif_text)
+    raise ValueError(f"Unknown template_id (no bank engine route): {template_id}")
 
-    if tid.startswith("DENIZBANK_"):
-        from .banks.denizbank.engine import run_template_check as _run
-        return _run(exif_struct, filename, template_id, file_size_bytes, exif_text)
 
-    if tid.startswith("VAKIFBANK_"):
-        from .banks.vakifbank.engine import run_template_check as _run
-        return _run(exif_struct, filename, template_id, file_size_bytes, exif_text)
+def run_template_checks(
+    items: Iterable[Sequence[Any]],
+    render_html: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Check many files in one call.
 
-    if tid.startswith("TURKIYEFINANS_"):
-        from .banks.turkiyefinans.engine import run_template_check as _run
-        return _run(exif_struct, filename, template_id, file_size_bytes, exif_text)
+    items: (exif_struct, filename, template_id[, file_size_bytes[, exif_text]])
+    Each bank engine is resolved once and its template data stays cached across
+    the batch. Raises ValueError on the first item with more than 5 fields or
+    an unroutable template id.
+    """
+    results: List[Dict[str, Any]] = []
+    for exif_struct, filename, template_id, *rest in items:
+        if len(rest) > 2:
+            raise ValueError(
+                f"Batch item has {3 + len(rest)} fields, expected 3 to 5: {template_id}"
+            )
+        file_size_bytes = rest[0] if len(rest) > 0 else None
+        exif_text = rest[1] if len(rest) > 1 else None
 
-    raise ValueError(f"Unknown template_id (no bank engine route): {template_id}")
+        results.append(
+            run_template_check(
+                exif_struct, filename, template_id, file_size_bytes, exif_text, render_html
+            )
+        )
+    return results